@@ -0,0 +1,84 @@
+"""Hard per-run budget for tool-using agents.
+
+A RunBudget counts the tool calls, model tokens and wall-clock time of one
+agent run. Once any limit is reached the budget is exhausted, and the agent
+examples then:
+
+- refuse further tool calls without calling the server,
+- take the research tools away from the model and tell it to answer, so the
+  next model call produces the final structured output.
+
+Usage:
+    budget = RunBudget(max_tool_calls=6, max_tokens=80_000, max_seconds=120)
+    tool_calls.new_run(budget)
+    ...
+    logger.info(f"Budget usage: {budget.usage()}")
+"""
+
+import logging
+import time
+
+from mcp.types import CallToolResult, TextContent
+
+logger = logging.getLogger("agent_budget")
+
+
+class RunBudget:
+    def __init__(self, max_tool_calls: int = 6, max_tokens: int = 80_000, max_seconds: float = 120):
+        self.max_tool_calls = max_tool_calls
+        self.max_tokens = max_tokens
+        self.max_seconds = max_seconds
+        self.tool_calls = 0
+        self.refused_tool_calls = 0
+        self.tokens = 0
+        self.exhausted_by: str | None = None
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def exhausted(self) -> str | None:
+        """Returns which limit was reached, or None while the budget lasts. Once exhausted, it stays exhausted."""
+        if self.exhausted_by is None:
+            if self.tool_calls >= self.max_tool_calls:
+                self.exhausted_by = f"{self.tool_calls} of {self.max_tool_calls} tool calls made"
+            elif self.tokens >= self.max_tokens:
+                self.exhausted_by = f"{self.tokens} of {self.max_tokens} tokens used"
+            elif self.elapsed >= self.max_seconds:
+                self.exhausted_by = f"{self.elapsed:.0f} of {self.max_seconds:.0f} seconds spent"
+            if self.exhausted_by:
+                logger.warning(f"Run budget exhausted: {self.exhausted_by}")
+        return self.exhausted_by
+
+    def charge_tool_call(self) -> bool:
+        """Counts a tool call that is about to reach the server, returning False if the budget does not allow it."""
+        if self.exhausted():
+            self.refused_tool_calls += 1
+            return False
+        self.tool_calls += 1
+        return True
+
+    def add_tokens(self, tokens: int) -> None:
+        self.tokens += tokens
+
+    def final_answer_instructions(self) -> str:
+        return (
+            f"The research budget for this run is used up ({self.exhausted_by}). "
+            "Do not call any more tools. Give your final answer now, based on what you found so far."
+        )
+
+    def refused_result(self) -> CallToolResult:
+        """The result returned instead of calling a tool once the budget is exhausted."""
+        return CallToolResult(
+            content=[TextContent(type="text", text=f"Not called. {self.final_answer_instructions()}")]
+        )
+
+    def usage(self) -> dict:
+        return {
+            "tool_calls": f"{self.tool_calls}/{self.max_tool_calls}",
+            "refused_tool_calls": self.refused_tool_calls,
+            "tokens": f"{self.tokens}/{self.max_tokens}",
+            "seconds": f"{self.elapsed:.1f}/{self.max_seconds:.0f}",
+            "exhausted_by": self.exhausted_by,
+        }
@@ -0,0 +1,139 @@
+"""Memoization and streaming of sub-agent answers for the supervisor examples.
+
+Supervisors often send a specialist the same question again ("my kids want
+pasta for dinner"), and each time the specialist runs a full agent loop.
+SubAgentMemo remembers each specialist's answer keyed by:
+
+- the specialist's name,
+- the whitespace- and case-normalized query, and
+- a fingerprint of the data the answer depends on, such as the output of
+  check_fridge() or get_current_date().
+
+When that data changes, the fingerprint changes and the specialist runs again.
+The fingerprint tools are decorated with @fingerprint_tool: while a specialist
+runs inside use_fingerprint(), they return the outputs the fingerprint was
+taken from instead of being called again, so the memoized answer is based on
+exactly the data in its key and a run costs no extra tool calls.
+Answers expire after `ttl` seconds, and the least recently used answers are
+evicted beyond `max_entries`.
+
+Memoization is opt-in: set MEMOIZE_SUB_AGENTS=true in the environment.
+
+Usage:
+    memo = SubAgentMemo(ttl=600)
+    fingerprint = {"check_fridge": check_fridge()}
+    key = memo.key("meal_agent", query, fingerprint)
+    if (answer := memo.get(key)) is None:
+        with use_fingerprint(fingerprint):
+            answer = await run_meal_agent(query)
+        memo.put(key, answer)
+
+Both supervisors also stream their agents' tokens, unless STREAM_RESPONSES=false:
+while token_sink is set, every agent passes its tokens to it as they are
+generated, and TokenPrinter is the sink that prints them to the console.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from rich.console import Console
+
+logger = logging.getLogger("agent_memo")
+
+MEMOIZE_SUB_AGENTS = os.getenv("MEMOIZE_SUB_AGENTS", "false").lower() == "true"
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+
+# When set, sub-agent and supervisor tokens are passed to this callback as (agent name, text) while they stream
+token_sink: ContextVar[Callable[[str, str], None] | None] = ContextVar("token_sink", default=None)
+
+# Outputs of the fingerprint tools, by tool name, that the running sub-agent's memo key was computed from
+fingerprint_outputs: ContextVar[dict[str, Any]] = ContextVar("fingerprint_outputs", default={})
+
+
+def fingerprint_tool(func: Callable) -> Callable:
+    """Makes a tool return its output from the current fingerprint, if it has one, instead of running again."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outputs = fingerprint_outputs.get()
+        if func.__name__ in outputs:
+            return outputs[func.__name__]
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def use_fingerprint(fingerprint: dict[str, Any]) -> Iterator[None]:
+    """Serves the fingerprint tools called within the block, including in tasks it starts, from the fingerprint."""
+    token = fingerprint_outputs.set(fingerprint)
+    try:
+        yield
+    finally:
+        fingerprint_outputs.reset(token)
+
+
+class SubAgentMemo:
+    def __init__(self, ttl: float = 600, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    def key(self, agent_name: str, query: str, fingerprint: Any = None) -> str:
+        """Returns the memo key for a query to an agent, given the data its answer depends on."""
+        normalized = " ".join(query.lower().split())
+        data = json.dumps(fingerprint, sort_keys=True, default=str)
+        return hashlib.sha256(f"{agent_name}\0{normalized}\0{data}".encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Returns the memoized answer, or None if there is none or it expired."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, answer: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, answer)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the number of memoized answers."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+class TokenPrinter:
+    """Prints streamed tokens line by line, with a header whenever another agent's line follows.
+
+    Sub-agents that run at the same time stream interleaved tokens, so each agent's
+    tokens are buffered until its line is complete and lines are never mixed.
+    """
+
+    def __init__(self):
+        self.console = Console(highlight=False)
+        self.source = None
+        self.partial_lines: dict[str, str] = {}
+
+    def __call__(self, source: str, text: str) -> None:
+        *lines, self.partial_lines[source] = (self.partial_lines.get(source, "") + text).split("\n")
+        for line in lines:
+            if source != self.source:
+                self.console.print(f"\n[bold]{source}:[/bold]")
+                self.source = source
+            self.console.print(line, markup=False)
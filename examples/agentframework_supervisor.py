@@ -1,15 +1,22 @@
 import asyncio
 import logging
-import os
 import random
+from collections.abc import Callable
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, Literal
 
 from agent_framework import ChatAgent
-from agent_framework.openai import OpenAIChatClient
-from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
-from dotenv import load_dotenv
-from pydantic import Field
+from agent_memo import (
+    MEMOIZE_SUB_AGENTS,
+    STREAM_RESPONSES,
+    SubAgentMemo,
+    TokenPrinter,
+    fingerprint_tool,
+    token_sink,
+    use_fingerprint,
+)
+from providers import aclose, get_agent_framework_client, prewarm
+from pydantic import BaseModel, Field
 from rich import print
 from rich.logging import RichHandler
 
@@ -19,33 +26,8 @@ logging.basicConfig(level=logging.WARNING, handlers=[handler], force=True, forma
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# Configure OpenAI client based on environment
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-async_credential = None
-if API_HOST == "azure":
-    async_credential = DefaultAzureCredential()
-    token_provider = get_bearer_token_provider(async_credential, "https://cognitiveservices.azure.com/.default")
-    client = OpenAIChatClient(
-        base_url=f"{os.environ['AZURE_OPENAI_ENDPOINT']}/openai/v1/",
-        api_key=token_provider,
-        model_id=os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"],
-    )
-elif API_HOST == "github":
-    client = OpenAIChatClient(
-        base_url="https://models.github.ai/inference",
-        api_key=os.environ["GITHUB_TOKEN"],
-        model_id=os.getenv("GITHUB_MODEL", "openai/gpt-4o"),
-    )
-elif API_HOST == "ollama":
-    client = OpenAIChatClient(
-        base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"),
-        api_key="none",
-        model_id=os.environ.get("OLLAMA_MODEL", "llama3.1:latest"),
-    )
-else:
-    client = OpenAIChatClient(api_key=os.environ["OPENAI_API_KEY"], model_id=os.environ.get("OPENAI_MODEL", "gpt-4o"))
+# Configure OpenAI client based on environment, sharing one pooled HTTP client across all agents
+client = get_agent_framework_client()
 
 # ----------------------------------------------------------------------------------
 # Sub-agent 1 tools: weekend planning
@@ -77,6 +59,7 @@ def get_activities(
     ]
 
 
+@fingerprint_tool
 def get_current_date() -> str:
     """Gets the current date from the system (YYYY-MM-DD)."""
     logger.info("Getting current date")
@@ -97,8 +80,7 @@ weekend_agent = ChatAgent(
 async def plan_weekend(query: str) -> str:
     """Plan a weekend based on user query and return the final response."""
     logger.info("Tool: plan_weekend invoked")
-    response = await weekend_agent.run(query)
-    return response.text
+    return await run_specialist("weekend", query)
 
 
 # ----------------------------------------------------------------------------------
@@ -138,6 +120,7 @@ def find_recipes(
     return recipes
 
 
+@fingerprint_tool
 def check_fridge() -> list[str]:
     """Returns a JSON list of ingredients currently in the fridge."""
     logger.info("Checking fridge for current ingredients")
@@ -162,8 +145,94 @@ meal_agent = ChatAgent(
 async def plan_meal(query: str) -> str:
     """Plan a meal based on user query and return the final response."""
     logger.info("Tool: plan_meal invoked")
-    response = await meal_agent.run(query)
-    return response.text
+    return await run_specialist("meal", query)
+
+
+# ----------------------------------------------------------------------------------
+# Concurrent fan-out to several sub-agents
+# ----------------------------------------------------------------------------------
+
+SPECIALISTS = {"weekend": weekend_agent, "meal": meal_agent}
+MAX_CONCURRENT_SPECIALISTS = 4
+SPECIALIST_TIMEOUT_SECONDS = 60
+
+specialist_slots = asyncio.Semaphore(MAX_CONCURRENT_SPECIALISTS)
+
+
+async def _run_agent(name: str, agent: ChatAgent, query: str) -> str:
+    """Runs an agent and returns its text, streaming its tokens to the token sink if one is set."""
+    sink = token_sink.get()
+    if sink is None:
+        response = await agent.run(query)
+        return response.text
+    chunks = []
+    async for update in agent.run_stream(query):
+        if update.text:
+            sink(name, update.text)
+            chunks.append(update.text)
+    # End the agent's output with a line break, so that line-buffered sinks print its last line
+    sink(name, "\n")
+    return "".join(chunks)
+
+
+# Data each specialist's answer depends on: memoized answers are only reused while these outputs are unchanged
+SPECIALIST_FINGERPRINTS = {"weekend": [get_current_date], "meal": [check_fridge]}
+sub_agent_memo = SubAgentMemo(ttl=600)
+
+
+async def run_specialist(name: str, query: str) -> str:
+    """Runs one sub-agent, waiting for a free slot and giving up after the timeout.
+
+    With MEMOIZE_SUB_AGENTS=true, a repeated query returns the earlier answer
+    as long as the specialist's fingerprint tools return the same data, and
+    a specialist that runs gets the outputs the memo key was computed from.
+    """
+    memo_key = None
+    fingerprint = {}
+    if MEMOIZE_SUB_AGENTS:
+        fingerprint = {tool.__name__: tool() for tool in SPECIALIST_FINGERPRINTS[name]}
+        memo_key = sub_agent_memo.key(name, query, fingerprint)
+        if (answer := sub_agent_memo.get(memo_key)) is not None:
+            logger.info(f"Reusing the memoized answer of the {name} agent")
+            if (sink := token_sink.get()) is not None:
+                sink(name, answer + "\n")
+            return answer
+
+    async with specialist_slots:
+        try:
+            with use_fingerprint(fingerprint):
+                answer = await asyncio.wait_for(
+                    _run_agent(name, SPECIALISTS[name], query), timeout=SPECIALIST_TIMEOUT_SECONDS
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"The {name} agent timed out after {SPECIALIST_TIMEOUT_SECONDS}s")
+            return f"The {name} agent did not answer in time."
+    if memo_key is not None:
+        sub_agent_memo.put(memo_key, answer)
+    return answer
+
+
+class SpecialistRequest(BaseModel):
+    specialist: Literal["weekend", "meal"] = Field(description="Which specialist agent to ask.")
+    query: str = Field(description="A clear, concise query for that specialist.")
+
+
+async def consult_specialists(
+    requests: Annotated[list[SpecialistRequest], Field(description="One request per specialist to consult.")],
+) -> str:
+    """Ask several specialist agents at once and return all of their responses."""
+    logger.info(f"Tool: consult_specialists invoked for {[request.specialist for request in requests]}")
+    # The sub-agents run concurrently, so asking both costs the slowest one's latency instead of the sum
+    results = await asyncio.gather(
+        *(run_specialist(request.specialist, request.query) for request in requests), return_exceptions=True
+    )
+    sections = []
+    for request, result in zip(requests, results):
+        if isinstance(result, Exception):
+            logger.warning(f"The {request.specialist} agent failed: {result!r}")
+            result = f"The {request.specialist} agent failed: {result}"
+        sections.append(f"## {request.specialist} agent\n{result}")
+    return "\n\n".join(sections)
 
 
 # ----------------------------------------------------------------------------------
@@ -175,19 +244,38 @@ supervisor_agent = ChatAgent(
     instructions=(
         "You are a supervisor managing two specialist agents: a weekend planning agent and a meal planning agent. "
         "Break down the user's request, decide which specialist (or both) to call via the available tools, "
-        "and then synthesize a final helpful answer. When invoking a tool, provide clear, concise queries."
+        "and then synthesize a final helpful answer. When invoking a tool, provide clear, concise queries. "
+        "When both specialists are needed, call consult_specialists once so they work at the same time."
     ),
-    tools=[plan_weekend, plan_meal],
+    tools=[plan_weekend, plan_meal, consult_specialists],
 )
 
 
+async def stream_supervisor(query: str, on_token: Callable[[str, str], None]) -> str:
+    """Runs the supervisor, passing specialist and supervisor tokens to on_token as they are generated.
+
+    The user sees the specialists' answers while they are written instead of waiting
+    for every specialist to finish before the supervisor starts its own answer.
+    """
+    token = token_sink.set(on_token)
+    try:
+        return await _run_agent("supervisor", supervisor_agent, query)
+    finally:
+        token_sink.reset(token)
+
+
 async def main():
+    await prewarm(framework="agent_framework")
     user_query = "my kids want pasta for dinner"
-    response = await supervisor_agent.run(user_query)
-    print(response.text)
+    if STREAM_RESPONSES:
+        await stream_supervisor(user_query, TokenPrinter())
+    else:
+        response = await supervisor_agent.run(user_query)
+        print(response.text)
+    if MEMOIZE_SUB_AGENTS:
+        logger.info(f"Sub-agent memo: {sub_agent_memo.stats()}")
 
-    if async_credential:
-        await async_credential.close()
+    await aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""Cached, proactively refreshed Azure bearer tokens for the examples.
+
+`get_bearer_token_provider(DefaultAzureCredential(), scope)` walks the whole
+credential chain (environment, managed identity, Azure CLI, ...) the first
+time a token is needed, which puts several seconds on the first request of
+every new process. This module keeps one token per scope in memory,
+optionally persists it to disk so that new worker processes can start with
+a valid token, and refreshes it on a background thread before it expires,
+so token acquisition never sits on the request path.
+
+Usage:
+    from azure_token_cache import get_bearer_token_provider
+
+    client = AsyncOpenAI(base_url=..., api_key=get_bearer_token_provider(use_async=True))
+
+Set AZURE_TOKEN_CACHE_PATH to a file path to enable the on-disk cache.
+The file holds bearer tokens, so it is created readable only by the current user.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from azure.identity import DefaultAzureCredential
+
+logger = logging.getLogger("azure_token_cache")
+
+AZURE_SCOPE = "https://cognitiveservices.azure.com/.default"
+
+# Refresh this many seconds before the token expires
+REFRESH_MARGIN = 300
+# Wait this many seconds before retrying a failed refresh
+RETRY_INTERVAL = 30
+
+
+class AzureTokenCache:
+    """Holds a bearer token for one scope and refreshes it in the background."""
+
+    def __init__(self, scope: str = AZURE_SCOPE, credential=None, cache_path: str | None = None):
+        self.scope = scope
+        self.credential = credential or DefaultAzureCredential()
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._token: str | None = None
+        self._expires_on = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresher: threading.Thread | None = None
+        self._load_from_disk()
+
+    def _is_fresh(self) -> bool:
+        return self._token is not None and time.time() < self._expires_on - REFRESH_MARGIN
+
+    def _load_from_disk(self) -> None:
+        if not self.cache_path or not self.cache_path.exists():
+            return
+        try:
+            entry = json.loads(self.cache_path.read_text())[self.scope]
+        except (OSError, ValueError, KeyError):
+            return
+        if entry["expires_on"] > time.time() + REFRESH_MARGIN:
+            self._token, self._expires_on = entry["token"], entry["expires_on"]
+            logger.info(f"Loaded cached token for {self.scope} from {self.cache_path}")
+
+    def _save_to_disk(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            entries = json.loads(self.cache_path.read_text()) if self.cache_path.exists() else {}
+        except (OSError, ValueError):
+            entries = {}
+        entries[self.scope] = {"token": self._token, "expires_on": self._expires_on}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # Each writer gets its own temporary file (created readable only by the current user),
+        # so processes saving at the same time never replace each other's half-written files
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, prefix=f"{self.cache_path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def refresh(self, only_if_expired: bool = False) -> None:
+        """Acquires a new token from the credential chain and stores it.
+
+        Refreshes are serialized, so callers racing the background thread
+        wait for the in-flight refresh instead of walking the chain again.
+        """
+        with self._lock:
+            if only_if_expired and self._token is not None and time.time() < self._expires_on:
+                return
+            access_token = self.credential.get_token(self.scope)
+            self._token, self._expires_on = access_token.token, float(access_token.expires_on)
+            try:
+                self._save_to_disk()
+            except OSError as e:
+                # The token is valid either way, so only later processes miss out on it
+                logger.warning(f"Could not save token for {self.scope} to {self.cache_path}: {e}")
+        logger.info(f"Refreshed token for {self.scope}")
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            if self._is_fresh():
+                delay = self._expires_on - REFRESH_MARGIN - time.time()
+            else:
+                try:
+                    self.refresh()
+                    continue
+                except Exception as e:
+                    logger.warning(f"Could not refresh token for {self.scope}: {e}")
+                    delay = RETRY_INTERVAL
+            self._stop.wait(max(delay, 1))
+
+    def start(self) -> None:
+        """Starts the background refresh thread, which also fetches the first token if needed."""
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, name="azure-token-refresh", daemon=True)
+            self._refresher.start()
+
+    def get_token(self) -> str:
+        """Returns the cached token, only blocking if no valid token has been acquired yet."""
+        self.start()
+        if self._token is None or time.time() >= self._expires_on:
+            self.refresh(only_if_expired=True)
+        return self._token
+
+    async def get_token_async(self) -> str:
+        """Async variant of get_token() that waits for a missing token off the event loop."""
+        if self._token is not None and time.time() < self._expires_on:
+            return self._token
+        return await asyncio.to_thread(self.get_token)
+
+    def close(self) -> None:
+        self._stop.set()
+        self.credential.close()
+
+
+_caches: dict[str, AzureTokenCache] = {}
+
+
+def get_token_cache(scope: str = AZURE_SCOPE) -> AzureTokenCache:
+    """Returns the process-wide token cache for a scope, creating and starting it on first use."""
+    if scope not in _caches:
+        _caches[scope] = AzureTokenCache(scope, cache_path=os.getenv("AZURE_TOKEN_CACHE_PATH") or None)
+        _caches[scope].start()
+    return _caches[scope]
+
+
+def get_bearer_token_provider(
+    scope: str = AZURE_SCOPE, use_async: bool = False
+) -> Callable[[], str] | Callable[[], Awaitable[str]]:
+    """Drop-in replacement for azure.identity's get_bearer_token_provider backed by the shared cache."""
+    cache = get_token_cache(scope)
+    return cache.get_token_async if use_async else cache.get_token
+
+
+def close() -> None:
+    """Stops all background refreshers and closes their credentials."""
+    for cache in _caches.values():
+        cache.close()
+    _caches.clear()
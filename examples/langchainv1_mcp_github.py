@@ -3,6 +3,12 @@
 This script demonstrates how to use LangChain v1 agent syntax with MCP tools
 exposed by the GitHub MCP endpoint. It preserves the Azure OpenAI vs GitHub
 model selection logic from the original LangGraph based example.
+
+The filtered GitHub tool definitions are cached on disk by mcp_tool_catalog,
+so only the first run lists the server's tools. Each run has a hard budget of
+tool calls, tokens and seconds; once it is used up, the agent must answer
+with its IssueProposal. Tool results are cut down to the fields triage needs
+before the model sees them, and can also be summarized by a cheaper model.
 """
 
 from __future__ import annotations
@@ -12,12 +18,16 @@ import logging
 import os
 from pathlib import Path
 
-import azure.identity
-from dotenv import load_dotenv
+from agent_budget import RunBudget
 from langchain.agents import create_agent
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
 from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_openai import ChatOpenAI
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp_result_shaping import ShapingRule, ShapingSession, chat_summarizer
+from mcp_session_pool import close_sessions
+from mcp_tool_call_cache import CachingSession
+from mcp_tool_catalog import ToolCatalog
+from providers import aclose, get_chat_openai
 from pydantic import BaseModel, Field
 from rich import print
 from rich.logging import RichHandler
@@ -25,33 +35,55 @@ from rich.logging import RichHandler
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("lang_triage")
 
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-if API_HOST == "azure":
-    token_provider = azure.identity.get_bearer_token_provider(
-        azure.identity.DefaultAzureCredential(),
-        "https://cognitiveservices.azure.com/.default",
-    )
-    model = ChatOpenAI(
-        model=os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT"),
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1/",
-        api_key=token_provider,
-    )
-elif API_HOST == "github":
-    model = ChatOpenAI(
-        model=os.getenv("GITHUB_MODEL", "gpt-4o"),
-        base_url="https://models.inference.ai.azure.com",
-        api_key=os.environ.get("GITHUB_TOKEN"),
-    )
-elif API_HOST == "ollama":
-    model = ChatOpenAI(
-        model=os.environ.get("OLLAMA_MODEL", "llama3.1"),
-        base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"),
-        api_key="none",
-    )
-else:
-    model = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+# Setup the model for the configured API_HOST, sharing one pooled HTTP client
+model = get_chat_openai()
+
+# Seconds that tool results are reused across runs: code changes less often than issues and pull requests
+TOOL_CACHE_TTLS = {"search_code": 1800, "search_issues": 600, "search_pull_requests": 600, "list_issues": 300}
+
+# The tool-call limit matches the budget stated in triager.prompt.md
+RUN_BUDGET = {"max_tool_calls": 6, "max_tokens": 80_000, "max_seconds": 120}
+
+# Fields of issues and pull requests that triage needs, under the names of both the REST and GraphQL based tools
+ISSUE_FIELDS = (
+    *("number", "title", "state", "html_url", "url", "user.login", "author.login", "labels.name", "comments"),
+    *("created_at", "createdAt", "updated_at", "updatedAt", "closed_at", "closedAt", "pull_request.merged_at", "body"),
+)
+ISSUE_RULE = ShapingRule(fields=ISSUE_FIELDS, max_items=10, max_text_chars=600, max_chars=12_000, summarize=True)
+RESULT_SHAPING_RULES = {
+    "list_issues": ISSUE_RULE,
+    "search_issues": ISSUE_RULE,
+    "search_pull_requests": ISSUE_RULE,
+    "search_code": ShapingRule(
+        fields=("name", "path", "html_url", "repository.full_name", "text_matches.fragment"),
+        max_items=20,
+        max_text_chars=300,
+        max_chars=8_000,
+    ),
+}
+# Results still over max_chars after shaping are summarized by this model, if enabled, instead of cut off
+SUMMARIZE_TOOL_RESULTS = os.getenv("SUMMARIZE_TOOL_RESULTS", "false").lower() == "true"
+SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL")
+
+
+class RunBudgetMiddleware(AgentMiddleware):
+    """Counts model tokens against the run budget and forces the final IssueProposal once it is exhausted."""
+
+    def __init__(self, budget: RunBudget):
+        super().__init__()
+        self.budget = budget
+
+    async def awrap_model_call(self, request: ModelRequest, handler) -> ModelResponse:
+        if self.budget.exhausted():
+            # Without the research tools, the only answer left to the model is the IssueProposal
+            request = request.override(
+                tools=[], system_prompt=f"{request.system_prompt}\n\n{self.budget.final_answer_instructions()}"
+            )
+        response = await handler(request)
+        for message in response.result:
+            if isinstance(message, AIMessage) and message.usage_metadata:
+                self.budget.add_tokens(message.usage_metadata["total_tokens"])
+        return response
 
 
 class IssueProposal(BaseModel):
@@ -65,27 +97,36 @@ class IssueProposal(BaseModel):
 
 
 async def main():
-    mcp_client = MultiServerMCPClient(
-        {
-            "github": {
-                "url": "https://api.githubcopilot.com/mcp/",
-                "transport": "streamable_http",
-                "headers": {"Authorization": f"Bearer {os.environ['GITHUB_TOKEN']}"},
-            }
-        }
-    )
-
-    tools = await mcp_client.get_tools()
     desired_tool_names = ("list_issues", "search_code", "search_issues", "search_pull_requests")
-    filtered_tools = [t for t in tools if t.name in desired_tool_names]
+    catalog = ToolCatalog(
+        "https://api.githubcopilot.com/mcp/",
+        headers={"Authorization": f"Bearer {os.environ['GITHUB_TOKEN']}"},
+        tool_names=desired_tool_names,
+    )
+    tool_calls = CachingSession(catalog.session, ttls=TOOL_CACHE_TTLS)
+    summarizer = chat_summarizer(get_chat_openai(model=SUMMARIZER_MODEL)) if SUMMARIZE_TOOL_RESULTS else None
+    shaped_tool_calls = ShapingSession(tool_calls, RESULT_SHAPING_RULES, summarizer)
+    # The session only connects on the first tool call, since the tool definitions come from the cache
+    filtered_tools = [convert_mcp_tool_to_langchain_tool(shaped_tool_calls, tool) for tool in await catalog.get_tools()]
 
     prompt_path = Path(__file__).parent / "triager.prompt.md"
     with prompt_path.open("r", encoding="utf-8") as f:
         prompt = f.read()
-    agent = create_agent(model, system_prompt=prompt, tools=filtered_tools, response_format=IssueProposal)
+    budget = RunBudget(**RUN_BUDGET)
+    tool_calls.new_run(budget)
+    agent = create_agent(
+        model,
+        system_prompt=prompt,
+        tools=filtered_tools,
+        response_format=IssueProposal,
+        middleware=[RunBudgetMiddleware(budget)],
+    )
 
     user_content = "Find an open issue from Azure-samples azure-search-openai-demo that can be closed."
-    async for step in agent.astream({"messages": [HumanMessage(content=user_content)]}, stream_mode="updates", config={"recursion_limit": 100}):
+    # The run budget ends the run long before the recursion limit, which only guards against a model that never answers
+    async for step in agent.astream(
+        {"messages": [HumanMessage(content=user_content)]}, stream_mode="updates", config={"recursion_limit": 40}
+    ):
         for step_name, step_data in step.items():
             last_message = step_data["messages"][-1]
             if isinstance(last_message, AIMessage) and last_message.tool_calls:
@@ -97,6 +138,14 @@ async def main():
             if step_data.get("structured_response"):
                 print(step_data["structured_response"])
 
+    logger.info(f"Tool calls: {tool_calls.run_stats()}")
+    logger.info(f"Budget usage: {budget.usage()}")
+    logger.info(f"Tool result characters before and after shaping: {shaped_tool_calls.stats()}")
+
+    await catalog.aclose()
+    await close_sessions()
+    await aclose()
+
 
 if __name__ == "__main__":
     logger.setLevel(logging.INFO)
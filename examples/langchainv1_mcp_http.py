@@ -6,68 +6,56 @@ Prerequisite:
 """
 import asyncio
 import logging
-import os
 
-import azure.identity
-from dotenv import load_dotenv
 from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_openai import ChatOpenAI
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp_session_pool import close_sessions, get_session
+from providers import aclose, get_chat_openai
 from rich.logging import RichHandler
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("lang_itinerary")
 
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-if API_HOST == "azure":
-    token_provider = azure.identity.get_bearer_token_provider(azure.identity.DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default")
-    model = ChatOpenAI(
-        model=os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT"),
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1",
-        api_key=token_provider,
-    )
-elif API_HOST == "github":
-    model = ChatOpenAI(
-        model=os.getenv("GITHUB_MODEL", "gpt-4o"),
-        base_url="https://models.inference.ai.azure.com",
-        api_key=os.environ.get("GITHUB_TOKEN"),
-    )
-elif API_HOST == "ollama":
-    model = ChatOpenAI(
-        model=os.environ.get("OLLAMA_MODEL", "llama3.1"),
-        base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"),
-        api_key="none",
-    )
-else:
-    model = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
-
-
-async def run_agent():
-    client = MultiServerMCPClient(
-        {
-            "itinerary": {
-                # Make sure you start your itinerary server on port 8000
-                "url": "http://localhost:8000/mcp/",
-                "transport": "streamable_http",
-            }
-        }
-    )
-
-    tools = await client.get_tools()
-    agent = create_agent(model, tools)
-
-    user_query = "Find me a hotel in San Francisco for 2 nights starting from 2026-01-01. " "I need a hotel with free WiFi and a pool."
+# Setup the model for the configured API_HOST, sharing one pooled HTTP client
+model = get_chat_openai()
 
+
+# Make sure you start your itinerary server on port 8000
+MCP_SERVER_URL = "http://localhost:8000/mcp/"
+
+agent = None
+
+
+async def get_agent():
+    """Builds the agent once per process, on a pooled MCP session that stays open across requests."""
+    global agent
+    if agent is None:
+        tools = await load_mcp_tools(get_session(MCP_SERVER_URL))
+        agent = create_agent(model, tools)
+    return agent
+
+
+async def run_agent(user_query: str) -> str:
+    agent = await get_agent()
     response = await agent.ainvoke({"messages": [HumanMessage(content=user_query)]})
-    final = response["messages"][-1].content
-    print(final)
+    return response["messages"][-1].content
+
+
+async def run_agents():
+    # Later requests reuse the open session and tools, skipping the initialize and tools/list round-trips
+    for user_query in [
+        "Find me a hotel in San Francisco for 2 nights starting from 2026-01-01. I need free WiFi and a pool.",
+        "Find me a budget hotel in Paris for 3 nights starting from 2026-02-10.",
+    ]:
+        print(await run_agent(user_query))
+
+    await close_sessions()
+    await aclose()
 
 
 def main():
-    asyncio.run(run_agent())
+    asyncio.run(run_agents())
 
 
 if __name__ == "__main__":
@@ -1,47 +1,90 @@
+import asyncio
 import logging
-import os
 import random
+from collections.abc import Callable
 from datetime import datetime
 
-import azure.identity
-from dotenv import load_dotenv
+from agent_memo import (
+    MEMOIZE_SUB_AGENTS,
+    STREAM_RESPONSES,
+    SubAgentMemo,
+    TokenPrinter,
+    fingerprint_tool,
+    token_sink,
+    use_fingerprint,
+)
 from langchain.agents import create_agent
-from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
-from langchain_openai import ChatOpenAI
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.tools import BaseTool, tool
+from langgraph.config import get_config
+from providers import aclose, get_chat_openai
 from rich import print
 from rich.logging import RichHandler
 
 logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
 logger = logging.getLogger("lang_triage")
 
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-if API_HOST == "azure":
-    token_provider = azure.identity.get_bearer_token_provider(
-        azure.identity.DefaultAzureCredential(),
-        "https://cognitiveservices.azure.com/.default",
-    )
-    base_model = ChatOpenAI(
-        model=os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT"),
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1",
-        api_key=token_provider,
-    )
-elif API_HOST == "github":
-    base_model = ChatOpenAI(
-        model=os.getenv("GITHUB_MODEL", "gpt-4o"),
-        base_url="https://models.inference.ai.azure.com",
-        api_key=os.environ.get("GITHUB_TOKEN"),
-    )
-elif API_HOST == "ollama":
-    base_model = ChatOpenAI(
-        model=os.environ.get("OLLAMA_MODEL", "llama3.1"),
-        base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"),
-        api_key="none",
-    )
-else:
-    base_model = ChatOpenAI(model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+# Setup the model for the configured API_HOST, sharing one pooled HTTP client
+base_model = get_chat_openai()
+
+
+def caller_namespace() -> str:
+    """Returns the checkpoint namespace of the graph node running this code, or "" outside of a graph."""
+    try:
+        return get_config()["configurable"].get("checkpoint_ns", "")
+    except RuntimeError:
+        return ""
+
+
+async def run_agent(name: str, agent, query: str) -> str:
+    """Runs an agent and returns its final answer, streaming its tokens to the token sink if one is set."""
+    sink = token_sink.get()
+    if sink is None:
+        response = await agent.ainvoke({"messages": [HumanMessage(content=query)]})
+        return response["messages"][-1].content
+    # A sub-agent run from a tool streams chunks namespaced as "<tool namespace>|model:<id>"
+    namespace = caller_namespace()
+    final = None
+    async for mode, data in agent.astream(
+        {"messages": [HumanMessage(content=query)]}, stream_mode=["messages", "values"]
+    ):
+        if mode == "values":
+            final = data["messages"][-1].content
+            continue
+        chunk, metadata = data
+        # Skip tokens of agents nested inside this one's tools, which stream to the sink themselves
+        if metadata.get("langgraph_checkpoint_ns", "").rpartition("|")[0] != namespace:
+            continue
+        if isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content:
+            sink(name, chunk.content)
+    # End the agent's output with a line break, so that line-buffered sinks print its last line
+    sink(name, "\n")
+    return final
+
+
+sub_agent_memo = SubAgentMemo(ttl=600)
+
+
+async def run_sub_agent(name: str, agent, query: str, fingerprint_tools: list[BaseTool]) -> str:
+    """Runs a sub-agent, reusing its earlier answer when MEMOIZE_SUB_AGENTS=true.
+
+    An earlier answer to the same query is only reused while the fingerprint tools,
+    the data the answer depends on, still return the same output. When the sub-agent
+    runs, those tools return the outputs the key was computed from.
+    """
+    if not MEMOIZE_SUB_AGENTS:
+        return await run_agent(name, agent, query)
+    fingerprint = {source.name: await source.ainvoke({}) for source in fingerprint_tools}
+    key = sub_agent_memo.key(name, query, fingerprint)
+    if (final := sub_agent_memo.get(key)) is not None:
+        logger.info(f"Reusing the memoized answer of {name}")
+        if (sink := token_sink.get()) is not None:
+            sink(name, final + "\n")
+        return final
+    with use_fingerprint(fingerprint):
+        final = await run_agent(name, agent, query)
+    sub_agent_memo.put(key, final)
+    return final
 
 
 # ----------------------------------------------------------------------------------
@@ -75,6 +118,7 @@ def get_activities(city: str, date: str) -> list:
 
 
 @tool
+@fingerprint_tool
 def get_current_date() -> str:
     """Gets the current date from the system and returns as a string in format YYYY-MM-DD."""
     logger.info("Getting current date")
@@ -89,12 +133,10 @@ weekend_agent = create_agent(
 
 
 @tool
-def plan_weekend(query: str) -> str:
+async def plan_weekend(query: str) -> str:
     """Plan a weekend based on user query and return the final response."""
     logger.info("Tool: plan_weekend invoked")
-    response = weekend_agent.invoke({"messages": [HumanMessage(content=query)]})
-    final = response["messages"][-1].content
-    return final
+    return await run_sub_agent("weekend_agent", weekend_agent, query, [get_current_date])
 
 
 # ----------------------------------------------------------------------------------
@@ -133,6 +175,7 @@ def find_recipes(query: str) -> list[dict]:
 
 
 @tool
+@fingerprint_tool
 def check_fridge() -> list[str]:
     """Returns a list of ingredients currently in the fridge."""
     logger.info("Checking fridge for current ingredients")
@@ -150,12 +193,10 @@ meal_agent = create_agent(
 
 
 @tool
-def plan_meal(query: str) -> str:
+async def plan_meal(query: str) -> str:
     """Plan a meal based on user query and return the final response."""
     logger.info("Tool: plan_meal invoked")
-    response = meal_agent.invoke({"messages": [HumanMessage(content=query)]})
-    final = response["messages"][-1].content
-    return final
+    return await run_sub_agent("meal_agent", meal_agent, query, [check_fridge])
 
 
 # ----------------------------------------------------------------------------------
@@ -168,12 +209,42 @@ supervisor_agent = create_agent(
 )
 
 
-def main():
-    response = supervisor_agent.invoke({"messages": [{"role": "user", "content": "my kids want pasta for dinner"}]})
-    latest_message = response["messages"][-1]
-    print(latest_message.content)
+async def answer(query: str) -> str:
+    """Runs the supervisor for one user query without blocking the event loop.
+
+    The sub-agent tools are async, so when the supervisor calls both in one turn they run
+    concurrently, and many queries can be answered at once from a single process.
+    """
+    return await run_agent("supervisor", supervisor_agent, query)
+
+
+async def stream_answer(query: str, on_token: Callable[[str, str], None]) -> str:
+    """Like answer(), but passes sub-agent and supervisor tokens to on_token as they are generated.
+
+    The user sees the sub-agents' answers while they are written instead of waiting
+    for every sub-agent to finish before the supervisor starts its own answer.
+    """
+    token = token_sink.set(on_token)
+    try:
+        return await answer(query)
+    finally:
+        token_sink.reset(token)
+
+
+async def main():
+    if STREAM_RESPONSES:
+        await stream_answer("plan my weekend and a dinner we can have after it", TokenPrinter())
+    else:
+        queries = ["my kids want pasta for dinner", "plan my weekend and a dinner we can have after it"]
+        for query, final in zip(queries, await asyncio.gather(*(answer(query) for query in queries))):
+            print(f"[bold]{query}[/bold]")
+            print(final)
+    if MEMOIZE_SUB_AGENTS:
+        logger.info(f"Sub-agent memo: {sub_agent_memo.stats()}")
+
+    await aclose()
 
 
 if __name__ == "__main__":
     logger.setLevel(logging.INFO)
-    main()
+    asyncio.run(main())
@@ -5,45 +5,23 @@ Start the local MCP server defined in `mcp_server_basic.py` on port 8000:
     python examples/mcp_server_basic.py
 """
 
-import os
-
-import azure.identity
-from dotenv import load_dotenv
-from langchain_mcp_adapters.client import MultiServerMCPClient
-from langchain_openai import ChatOpenAI
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.graph import START, MessagesState, StateGraph
 from langgraph.prebuilt import ToolNode, tools_condition
+from mcp_session_pool import close_sessions, get_session
+from providers import aclose, get_chat_openai
 
-# Setup the client to use either Azure OpenAI or GitHub Models
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
+# Setup the model for the configured API_HOST, sharing one pooled HTTP client
+model = get_chat_openai()
 
-if API_HOST == "azure":
-    token_provider = azure.identity.get_bearer_token_provider(azure.identity.DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default")
-    model = ChatOpenAI(
-        model=os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT"),
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1",
-        api_key=token_provider,
-    )
-else:
-    model = ChatOpenAI(
-        model=os.getenv("GITHUB_MODEL", "gpt-4o"),
-        base_url="https://models.inference.ai.azure.com",
-        api_key=os.environ["GITHUB_TOKEN"],
-    )
+
+# make sure you start your weather server on port 8000
+MCP_SERVER_URL = "http://localhost:8000/mcp/"
 
 
 async def setup_agent():
-    client = MultiServerMCPClient(
-        {
-            "weather": {
-                # make sure you start your weather server on port 8000
-                "url": "http://localhost:8000/mcp/",
-                "transport": "streamable_http",
-            }
-        }
-    )
-    tools = await client.get_tools()
+    # The pooled session stays open for the whole process, so every graph run reuses it
+    tools = await load_mcp_tools(get_session(MCP_SERVER_URL))
 
     def call_model(state: MessagesState):
         response = model.bind_tools(tools).invoke(state["messages"])
@@ -65,6 +43,9 @@ async def setup_agent():
     with open("examples/images/langgraph_mcp_http_graph.png", "wb") as f:
         f.write(image_bytes)
 
+    await close_sessions()
+    await aclose()
+
 
 if __name__ == "__main__":
     import asyncio
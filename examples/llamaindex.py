@@ -3,9 +3,9 @@
 import os
 from pathlib import Path
 
-import azure.identity
+from azure_token_cache import get_bearer_token_provider
 from dotenv import load_dotenv
-from llama_index.core import Settings, SimpleDirectoryReader, StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core import Settings
 from llama_index.core.agent.workflow import AgentStream, ReActAgent
 from llama_index.core.tools import QueryEngineTool
 from llama_index.core.workflow import Context
@@ -13,90 +13,94 @@ from llama_index.embeddings.azure_openai import AzureOpenAIEmbedding
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.llms.azure_openai import AzureOpenAI
 from llama_index.llms.openai_like import OpenAILike
-
-# Setup the client to use either Azure OpenAI or GitHub Models
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-if API_HOST == "azure":
-    token_provider = azure.identity.get_bearer_token_provider(
-        azure.identity.DefaultAzureCredential(), "https://cognitiveservices.azure.com/.default"
-    )
-    Settings.llm = AzureOpenAI(
-        model=os.environ["AZURE_OPENAI_CHAT_MODEL"],
-        deployment_name=os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"],
-        azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-        api_version=os.environ["AZURE_OPENAI_VERSION"],
-        use_azure_ad=True,
-        azure_ad_token_provider=token_provider,
-    )
-
-    Settings.embed_model = AzureOpenAIEmbedding(
-        model=os.environ["AZURE_OPENAI_EMBEDDING_MODEL"],
-        deployment_name=os.environ["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"],
-        azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-        api_version=os.environ["AZURE_OPENAI_VERSION"],
-        use_azure_ad=True,
-        azure_ad_token_provider=token_provider,
-    )
-else:
-    Settings.llm = OpenAILike(
-        model=os.getenv("GITHUB_MODEL", "gpt-4o"),
-        api_base="https://models.inference.ai.azure.com",
-        api_key=os.environ["GITHUB_TOKEN"],
-        is_chat_model=True,
-    )
-
-    Settings.embed_model = OpenAIEmbedding(
-        model="text-embedding-3-small",
-        api_base="https://models.inference.ai.azure.com",
-        api_key=os.environ["GITHUB_TOKEN"],
+from llamaindex_embedding_cache import CachedEmbedding
+from llamaindex_query_cache import CachedQueryEngine
+from llamaindex_storage import load_or_build_indexes
+
+root_dir = Path(__file__).parent.parent
+storage_dir = root_dir / "example_data/.llama_index_storage"
+
+
+def configure_settings() -> None:
+    """Sets up the LLM and the embedding model for either Azure OpenAI or GitHub Models.
+
+    This runs from the __main__ block, not at import, since the parser worker processes
+    re-import this module when they are spawned and do not need any clients.
+    """
+    load_dotenv(override=True)
+    if os.getenv("API_HOST", "github") == "azure":
+        token_provider = get_bearer_token_provider()
+        Settings.llm = AzureOpenAI(
+            model=os.environ["AZURE_OPENAI_CHAT_MODEL"],
+            deployment_name=os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"],
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+            api_version=os.environ["AZURE_OPENAI_VERSION"],
+            use_azure_ad=True,
+            azure_ad_token_provider=token_provider,
+        )
+
+        Settings.embed_model = AzureOpenAIEmbedding(
+            model=os.environ["AZURE_OPENAI_EMBEDDING_MODEL"],
+            deployment_name=os.environ["AZURE_OPENAI_EMBEDDING_DEPLOYMENT"],
+            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+            api_version=os.environ["AZURE_OPENAI_VERSION"],
+            use_azure_ad=True,
+            azure_ad_token_provider=token_provider,
+        )
+    else:
+        Settings.llm = OpenAILike(
+            model=os.getenv("GITHUB_MODEL", "gpt-4o"),
+            api_base="https://models.inference.ai.azure.com",
+            api_key=os.environ["GITHUB_TOKEN"],
+            is_chat_model=True,
+        )
+
+        Settings.embed_model = OpenAIEmbedding(
+            model="text-embedding-3-small",
+            api_base="https://models.inference.ai.azure.com",
+            api_key=os.environ["GITHUB_TOKEN"],
+        )
+
+    # Cache embeddings on disk so identical chunks and repeated queries are only embedded once
+    Settings.embed_model = CachedEmbedding(Settings.embed_model, storage_dir / "embedding_cache.sqlite3")
+
+
+def build_query_engine_tools() -> list[QueryEngineTool]:
+    # Load each document's index from storage, parsing and re-embedding changed documents in parallel
+    index1, index2 = load_or_build_indexes(
+        [root_dir / "example_data/employee_handbook.pdf", root_dir / "example_data/PerksPlus.pdf"], storage_dir
     )
 
-# Try to load the index from storage
-try:
-    storage_context = StorageContext.from_defaults(persist_dir="./storage/docs1")
-    index1 = load_index_from_storage(storage_context)
-
-    storage_context = StorageContext.from_defaults(persist_dir="./storage/docs2")
-    index2 = load_index_from_storage(storage_context)
-
-    index_loaded = True
-except FileNotFoundError:
-    index_loaded = False
-
-if not index_loaded:
-    root_dir = Path(__file__).parent.parent
-
-    docs1 = SimpleDirectoryReader(input_files=[root_dir / "example_data/employee_handbook.pdf"]).load_data()
-    docs2 = SimpleDirectoryReader(input_files=[root_dir / "example_data/PerksPlus.pdf"]).load_data()
-    index1 = VectorStoreIndex.from_documents(docs1)
-    index2 = VectorStoreIndex.from_documents(docs2)
-
-    index1.storage_context.persist(persist_dir=root_dir / "example_data/.llama_index_storage/docs1")
-    index2.storage_context.persist(persist_dir=root_dir / "example_data/.llama_index_storage/docs2")
-
-engine1 = index1.as_query_engine(similarity_top_k=3)
-engine2 = index2.as_query_engine(similarity_top_k=3)
-
-query_engine_tools = [
-    QueryEngineTool.from_defaults(
-        query_engine=engine1,
-        name="engine1",
-        description=(
-            "Provides information about Contoso employee handbook - covering basic job roles, policies, workplace safety, HR, etc."
+    # These indexes are small enough to search exactly. For large document sets, pass
+    # vector_store_kwargs={"search": "ivf", "n_probe": 16} for approximate search instead.
+    engine1 = index1.as_query_engine(similarity_top_k=3, vector_store_kwargs={"search": "exact"})
+    engine2 = index2.as_query_engine(similarity_top_k=3, vector_store_kwargs={"search": "exact"})
+
+    # Reuse answers to repeated sub-questions until the index changes. Matching by embedding similarity
+    # (similarity_threshold=0.95) is left off: short questions about different topics, like reimbursing
+    # gardening tools vs. a gym membership, can be similar enough to get each other's answers.
+    engine1 = CachedQueryEngine(engine1, index1, ttl=600)
+    engine2 = CachedQueryEngine(engine2, index2, ttl=600)
+
+    return [
+        QueryEngineTool.from_defaults(
+            query_engine=engine1,
+            name="engine1",
+            description=(
+                "Provides information about Contoso employee handbook - covering basic job roles, policies, workplace safety, HR, etc."
+            ),
+        ),
+        QueryEngineTool.from_defaults(
+            query_engine=engine2,
+            name="engine2",
+            description=("Provides information about Contoso PerksPlus program, including what can be reimbursed. "),
         ),
-    ),
-    QueryEngineTool.from_defaults(
-        query_engine=engine2,
-        name="engine2",
-        description=("Provides information about Contoso PerksPlus program, including what can be reimbursed. "),
-    ),
-]
+    ]
 
 
 async def main():
-    agent = ReActAgent(tools=query_engine_tools, llm=Settings.llm)
+    tools = build_query_engine_tools()
+    agent = ReActAgent(tools=tools, llm=Settings.llm)
     ctx = Context(agent)
 
     handler = agent.run("can i get my gardening tools reimbursed?", ctx=ctx)
@@ -107,9 +111,13 @@ async def main():
 
     response = await handler
     print(str(response))
+    print(f"Embedding cache: {Settings.embed_model.stats()}")
+    for tool in tools:
+        print(f"Query cache for {tool.metadata.name}: {tool.query_engine.stats()}")
 
 
 if __name__ == "__main__":
     import asyncio
 
+    configure_settings()
     asyncio.run(main())
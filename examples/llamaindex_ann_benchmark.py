@@ -0,0 +1,99 @@
+"""Recall vs latency benchmark for the IVF search option of NumpyVectorStore.
+
+The example_data indexes only hold a few dozen chunks, so this script scales
+them up synthetically: every synthetic vector is a random mix of two real
+chunk embeddings plus noise. It then compares exact search against IVF search
+with increasing `n_probe` values, reporting recall@k (the fraction of the
+exact top k that IVF also returns) and per-query latency.
+
+No model calls are made; the script only needs the persisted indexes.
+
+Usage:
+    python examples/llamaindex_ann_benchmark.py --size 1000000 --queries 200
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from llamaindex_vector_store import NumpyVectorStore
+from rich import print
+from rich.table import Table
+
+STORAGE_DIR = Path(__file__).parent.parent / "example_data/.llama_index_storage"
+
+
+def load_base_vectors() -> np.ndarray:
+    """Returns the chunk embeddings of all persisted example indexes."""
+    stores = [NumpyVectorStore.from_persist_dir(path) for path in sorted(STORAGE_DIR.iterdir()) if path.is_dir()]
+    return np.concatenate([np.asarray(store.vectors) for store in stores if len(store.vectors)])
+
+
+def synthesize(base: np.ndarray, size: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Returns `size` normalized vectors that mix pairs of base vectors and add Gaussian noise."""
+    vectors = np.empty((size, base.shape[1]), dtype=np.float32)
+    for start in range(0, size, 65536):
+        n = min(65536, size - start)
+        weights = rng.random((n, 1), dtype=np.float32)
+        mixed = weights * base[rng.integers(len(base), size=n)] + (1 - weights) * base[rng.integers(len(base), size=n)]
+        mixed += rng.normal(0, noise / np.sqrt(base.shape[1]), mixed.shape).astype(np.float32)
+        vectors[start : start + n] = mixed / np.linalg.norm(mixed, axis=1, keepdims=True)
+    return vectors
+
+
+def time_queries(store: NumpyVectorStore, queries: np.ndarray, top_k: int, **search_kwargs):
+    """Returns the result IDs and latencies in milliseconds of each query."""
+    results, latencies = [], []
+    for query_vector in queries:
+        query = VectorStoreQuery(query_embedding=query_vector.tolist(), similarity_top_k=top_k)
+        start = time.perf_counter()
+        result = store.query(query, **search_kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append(set(result.ids))
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000, help="Number of synthetic vectors to index")
+    parser.add_argument("--queries", type=int, default=100, help="Number of queries to run")
+    parser.add_argument("--top-k", type=int, default=3, help="Number of results per query")
+    parser.add_argument("--n-lists", type=int, default=None, help="Number of IVF clusters (default 4 * sqrt(size))")
+    parser.add_argument("--noise", type=float, default=0.5, help="Noise added to each synthetic vector")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    base = load_base_vectors()
+    vectors = synthesize(base, args.size, args.noise, rng)
+    queries = synthesize(base, args.queries, args.noise, rng)
+    store = NumpyVectorStore(vectors, [str(i) for i in range(args.size)], [str(i) for i in range(args.size)])
+
+    start = time.perf_counter()
+    n_lists = store.build_ivf(args.n_lists)
+    build_seconds = time.perf_counter() - start
+    print(f"{args.size} vectors of {vectors.shape[1]} dimensions, {n_lists} IVF clusters built in {build_seconds:.1f}s")
+
+    exact_results, exact_latencies = time_queries(store, queries, args.top_k, search="exact")
+    table = Table(title=f"Recall@{args.top_k} and latency over {args.queries} queries")
+    for column in ("search", "recall", "mean ms", "p95 ms"):
+        table.add_column(column, justify="right")
+    table.add_row("exact", "1.000", f"{exact_latencies.mean():.2f}", f"{np.percentile(exact_latencies, 95):.2f}")
+    for n_probe in (1, 4, 8, 16, 32, 64):
+        if n_probe > n_lists:
+            break
+        results, latencies = time_queries(store, queries, args.top_k, search="ivf", n_probe=n_probe)
+        recall = np.mean([len(found & exact) / len(exact) for found, exact in zip(results, exact_results)])
+        table.add_row(
+            f"ivf n_probe={n_probe}",
+            f"{recall:.3f}",
+            f"{latencies.mean():.2f}",
+            f"{np.percentile(latencies, 95):.2f}",
+        )
+    print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Disk-backed embedding cache for the LlamaIndex examples.
+
+CachedEmbedding wraps any LlamaIndex embedding model and stores every
+embedding it computes in a SQLite file, keyed by the model name and the
+whitespace-normalized text. Identical chunks across indexes, unchanged chunks
+of a re-indexed page, and repeated queries are then served from the cache
+instead of the embeddings endpoint. The least recently used entries are
+evicted once the cache holds more than `max_entries` embeddings.
+
+Usage:
+    Settings.embed_model = CachedEmbedding(Settings.embed_model, "embedding_cache.sqlite3")
+    ...
+    print(Settings.embed_model.stats())
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from pydantic import Field, PrivateAttr
+
+
+class CachedEmbedding(BaseEmbedding):
+    embed_model: BaseEmbedding = Field(description="The embedding model whose results are cached.")
+    cache_path: str = Field(description="Path of the SQLite file holding the cache.")
+    max_entries: int = Field(default=100_000, description="Number of embeddings kept before evicting.")
+
+    _conn: sqlite3.Connection = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr()
+    _hits: int = PrivateAttr(default=0)
+    _misses: int = PrivateAttr(default=0)
+
+    def __init__(self, embed_model: BaseEmbedding, cache_path: str | Path, max_entries: int = 100_000, **kwargs):
+        super().__init__(
+            embed_model=embed_model,
+            cache_path=str(cache_path),
+            max_entries=max_entries,
+            model_name=embed_model.model_name,
+            embed_batch_size=embed_model.embed_batch_size,
+            **kwargs,
+        )
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, embedding BLOB, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _key(self, kind: str, text: str) -> str:
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{normalized}".encode()).hexdigest()
+
+    def _lookup(self, keys: list[str]) -> dict[str, Embedding]:
+        found = {}
+        with self._lock:
+            for key in set(keys):
+                row = self._conn.execute("SELECT embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row:
+                    found[key] = array("d", row[0]).tolist()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?", [(time.time(), key) for key in found]
+            )
+            self._conn.commit()
+            self._hits += sum(1 for key in keys if key in found)
+            self._misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def _store(self, embeddings: dict[str, Embedding]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                [(key, array("d", embedding).tobytes(), time.time()) for key, embedding in embeddings.items()],
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Returns cache hit/miss counters for this process and the number of cached embeddings."""
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        return {"hits": self._hits, "misses": self._misses, "size": size}
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        key = self._key("query", query)
+        if cached := self._lookup([key]):
+            return cached[key]
+        embedding = self.embed_model.get_query_embedding(query)
+        self._store({key: embedding})
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        key = self._key("query", query)
+        if cached := self._lookup([key]):
+            return cached[key]
+        embedding = await self.embed_model.aget_query_embedding(query)
+        self._store({key: embedding})
+        return embedding
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self._get_text_embeddings([text])[0]
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return (await self._aget_text_embeddings([text]))[0]
+
+    def _missing_texts(self, texts: list[str]) -> tuple[list[str], dict[str, Embedding], dict[str, str]]:
+        """Returns the cache keys of the texts, their cached embeddings, and the texts that still need embedding."""
+        keys = [self._key("text", text) for text in texts]
+        cached = self._lookup(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in cached}
+        return keys, cached, missing
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        keys, embeddings, missing = self._missing_texts(texts)
+        if missing:
+            new_embeddings = dict(zip(missing, self.embed_model.get_text_embedding_batch(list(missing.values()))))
+            self._store(new_embeddings)
+            embeddings.update(new_embeddings)
+        return [embeddings[key] for key in keys]
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        keys, embeddings, missing = self._missing_texts(texts)
+        if missing:
+            new_embeddings = dict(
+                zip(missing, await self.embed_model.aget_text_embedding_batch(list(missing.values())))
+            )
+            self._store(new_embeddings)
+            embeddings.update(new_embeddings)
+        return [embeddings[key] for key in keys]
@@ -0,0 +1,135 @@
+"""Query result cache for the LlamaIndex query engines used as agent tools.
+
+A ReAct agent often asks the same query engine nearly the same sub-question
+several times in one run, and each call costs a retrieval plus an LLM
+synthesis call. CachedQueryEngine wraps a query engine and returns the cached
+response when:
+
+- the whitespace- and case-normalized query was asked before, or
+- with `similarity_threshold` set, a previous query's embedding has at least
+  that cosine similarity with the new query's embedding. This is off by
+  default: short questions on different topics can be that similar too and
+  would then get another question's answer, so only set it after checking
+  it against the questions your agent asks.
+
+Entries expire after `ttl` seconds, the least recently used entries are
+evicted beyond `max_entries`, and all entries are invalidated when the
+index's vector store changes (see NumpyVectorStore.version).
+
+Usage:
+    engine = CachedQueryEngine(index.as_query_engine(similarity_top_k=3), index)
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from llama_index.core import Settings, VectorStoreIndex
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+from llama_index.core.base.response.schema import RESPONSE_TYPE
+from llama_index.core.prompts.mixin import PromptMixinType
+from llama_index.core.schema import QueryBundle
+
+logger = logging.getLogger("llamaindex_query_cache")
+
+
+@dataclass
+class CacheEntry:
+    response: RESPONSE_TYPE
+    embedding: np.ndarray | None
+    expires_at: float
+
+
+class CachedQueryEngine(BaseQueryEngine):
+    def __init__(
+        self,
+        query_engine: BaseQueryEngine,
+        index: VectorStoreIndex,
+        ttl: float = 600,
+        max_entries: int = 256,
+        similarity_threshold: float | None = None,
+    ):
+        super().__init__(callback_manager=query_engine.callback_manager)
+        self.query_engine = query_engine
+        self.index = index
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._index_version = self._current_index_version()
+
+    def _get_prompt_modules(self) -> PromptMixinType:
+        return {"query_engine": self.query_engine}
+
+    def _current_index_version(self):
+        return getattr(self.index.vector_store, "version", None)
+
+    def _lookup(self, query: str, embedding: np.ndarray | None) -> RESPONSE_TYPE | None:
+        if self._current_index_version() != self._index_version:
+            logger.info("Index changed, clearing query cache")
+            self._entries.clear()
+            self._index_version = self._current_index_version()
+
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            del self._entries[key]
+
+        key = " ".join(query.lower().split())
+        if key not in self._entries and embedding is not None:
+            # Fall back to the most similar earlier query above the threshold
+            similarities = {
+                cached_key: float(entry.embedding @ embedding)
+                for cached_key, entry in self._entries.items()
+                if entry.embedding is not None
+            }
+            best_key = max(similarities, key=similarities.get, default=None)
+            if best_key is not None and similarities[best_key] >= self.similarity_threshold:
+                key = best_key
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key].response
+        self.misses += 1
+        return None
+
+    def _store(self, query: str, embedding: np.ndarray | None, response: RESPONSE_TYPE) -> None:
+        key = " ".join(query.lower().split())
+        self._entries[key] = CacheEntry(response, embedding, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Returns cache hit/miss counters and the number of cached responses."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _normalized_embedding(self, embedding: list[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1)
+
+    def _query(self, query_bundle: QueryBundle) -> RESPONSE_TYPE:
+        embedding = None
+        if self.similarity_threshold is not None:
+            embedding = self._normalized_embedding(Settings.embed_model.get_query_embedding(query_bundle.query_str))
+        if (response := self._lookup(query_bundle.query_str, embedding)) is not None:
+            return response
+        response = self.query_engine.query(query_bundle)
+        self._store(query_bundle.query_str, embedding, response)
+        return response
+
+    async def _aquery(self, query_bundle: QueryBundle) -> RESPONSE_TYPE:
+        embedding = None
+        if self.similarity_threshold is not None:
+            embedding = self._normalized_embedding(
+                await Settings.embed_model.aget_query_embedding(query_bundle.query_str)
+            )
+        if (response := self._lookup(query_bundle.query_str, embedding)) is not None:
+            return response
+        response = await self.query_engine.aquery(query_bundle)
+        self._store(query_bundle.query_str, embedding, response)
+        return response
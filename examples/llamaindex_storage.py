@@ -0,0 +1,161 @@
+"""Incrementally updated persistence for the LlamaIndex examples.
+
+Each document gets its own index directory named after the document and the
+embedding model used to build it:
+
+    example_data/.llama_index_storage/employee_handbook-text-embedding-3-small/
+
+The directory also holds a manifest with the SHA-256 hash of the document
+it was built from. When the hash matches, the index is loaded as is. When the
+document changed, only the pages whose content changed are re-embedded and
+upserted into the existing index, and pages that no longer exist are deleted.
+Embeddings are kept in a memory-mapped NumpyVectorStore, see llamaindex_vector_store.py.
+Several documents can be loaded at once with load_or_build_indexes(), which
+parses and embeds the documents that need (re)indexing in parallel.
+"""
+
+import hashlib
+import json
+import logging
+import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from llama_index.core import (
+    Document,
+    Settings,
+    SimpleDirectoryReader,
+    StorageContext,
+    VectorStoreIndex,
+    load_index_from_storage,
+)
+from llamaindex_vector_store import VECTORS_FILE, NumpyVectorStore
+
+logger = logging.getLogger("llamaindex_storage")
+
+MANIFEST_FILE = "source.json"
+# Build an IVF index for approximate search once an index holds this many chunks
+IVF_MIN_VECTORS = 50_000
+
+
+def file_hash(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_documents(doc_path: Path) -> list[Document]:
+    """Loads a document as one Document per page, with IDs that stay stable across versions.
+
+    Only the file name is kept as file metadata, since volatile metadata like
+    modification dates would change every page's hash and defeat incremental updates.
+    """
+    documents = SimpleDirectoryReader(
+        input_files=[doc_path], file_metadata=lambda path: {"file_name": Path(path).name}
+    ).load_data()
+    for page_number, document in enumerate(documents, start=1):
+        document.id_ = f"{doc_path.name}#page={page_number}"
+    return documents
+
+
+def update_index(index: VectorStoreIndex, documents: list[Document]) -> None:
+    """Re-embeds the pages that changed and deletes the pages that were removed."""
+    refreshed = index.refresh_ref_docs(documents)
+    current_ids = {document.id_ for document in documents}
+    removed_ids = [ref_doc_id for ref_doc_id in index.ref_doc_info if ref_doc_id not in current_ids]
+    for ref_doc_id in removed_ids:
+        index.delete_ref_doc(ref_doc_id, delete_from_docstore=True)
+    logger.info(f"Re-embedded {sum(refreshed)} of {len(documents)} pages, deleted {len(removed_ids)} pages")
+
+
+def _load_persisted_index(persist_dir: Path, source_hash: str) -> tuple[VectorStoreIndex | None, bool]:
+    """Returns the persisted index, if readable, and whether it was built from the given source hash."""
+    if not persist_dir.exists():
+        return None, False
+    index = None
+    try:
+        vector_store = NumpyVectorStore.from_persist_dir(persist_dir)
+        index = load_index_from_storage(
+            StorageContext.from_defaults(persist_dir=str(persist_dir), vector_store=vector_store)
+        )
+        manifest = json.loads((persist_dir / MANIFEST_FILE).read_text())
+        return index, manifest["sha256"] == source_hash
+    except (FileNotFoundError, ValueError, KeyError) as e:
+        logger.warning(f"Could not fully load index in {persist_dir}: {e}")
+        return index, False
+
+
+def _build_or_update_index(
+    doc_path: Path, documents: list[Document], index: VectorStoreIndex | None, persist_dir: Path, source_hash: str
+) -> VectorStoreIndex:
+    if index is None:
+        logger.info(f"Building index for {doc_path.name} in {persist_dir}")
+        # Embed synchronously: this runs on a builder thread, and async embedding would start a separate
+        # event loop there, binding the embedding model's shared HTTP client to a loop that is then closed
+        storage_context = StorageContext.from_defaults(vector_store=NumpyVectorStore())
+        index = VectorStoreIndex.from_documents(documents, storage_context=storage_context)
+    else:
+        logger.info(f"Updating index for {doc_path.name} in {persist_dir}")
+        update_index(index, documents)
+    if len(index.vector_store.vectors) >= IVF_MIN_VECTORS:
+        index.vector_store.build_ivf()
+    persist_index(index, persist_dir, source_hash)
+    return index
+
+
+def load_or_build_indexes(
+    doc_paths: list[Path], storage_dir: Path, max_workers: int | None = None
+) -> list[VectorStoreIndex]:
+    """Loads the persisted index for each document, building or updating the stale ones in parallel.
+
+    Stale documents are parsed in a process pool, and each one is handed to a
+    thread pool for embedding as soon as it is parsed, so documents are
+    parsed on all cores and embedded concurrently.
+    """
+    indexes = {}
+    stale = {}
+    for doc_path in doc_paths:
+        persist_dir = storage_dir / f"{doc_path.stem}-{Settings.embed_model.model_name}"
+        source_hash = file_hash(doc_path)
+        index, up_to_date = _load_persisted_index(persist_dir, source_hash)
+        if up_to_date:
+            if not (persist_dir / VECTORS_FILE).exists():
+                # Convert indexes persisted by SimpleVectorStore so that later loads can memory-map them
+                persist_index(index, persist_dir, source_hash)
+            indexes[doc_path] = index
+        else:
+            stale[doc_path] = (index, persist_dir, source_hash)
+
+    if len(stale) == 1:
+        doc_path, (index, persist_dir, source_hash) = next(iter(stale.items()))
+        indexes[doc_path] = _build_or_update_index(doc_path, load_documents(doc_path), index, persist_dir, source_hash)
+    elif stale:
+        with ProcessPoolExecutor(max_workers) as parsers, ThreadPoolExecutor(max_workers) as builders:
+            parse_futures = {parsers.submit(load_documents, doc_path): doc_path for doc_path in stale}
+            build_futures = {}
+            for future in as_completed(parse_futures):
+                doc_path = parse_futures[future]
+                build_future = builders.submit(_build_or_update_index, doc_path, future.result(), *stale[doc_path])
+                build_futures[build_future] = doc_path
+            for future in as_completed(build_futures):
+                indexes[build_futures[future]] = future.result()
+
+    return [indexes[doc_path] for doc_path in doc_paths]
+
+
+def load_or_build_index(doc_path: Path, storage_dir: Path) -> VectorStoreIndex:
+    """Loads the persisted index for a document, updating it first if the document changed."""
+    return load_or_build_indexes([doc_path], storage_dir)[0]
+
+
+def persist_index(index: VectorStoreIndex, persist_dir: Path, source_hash: str) -> None:
+    """Persists an index and its manifest so that readers never see a partially written directory."""
+    tmp_dir = persist_dir.with_name(persist_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    index.storage_context.persist(persist_dir=str(tmp_dir))
+    (tmp_dir / MANIFEST_FILE).write_text(json.dumps({"sha256": source_hash}))
+    shutil.rmtree(persist_dir, ignore_errors=True)
+    tmp_dir.rename(persist_dir)
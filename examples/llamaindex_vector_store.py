@@ -0,0 +1,246 @@
+"""Memory-mapped NumPy vector store for the LlamaIndex examples.
+
+LlamaIndex's default SimpleVectorStore persists embeddings as JSON lists,
+so loading an index parses every float into a Python object. NumpyVectorStore
+instead persists the embeddings as one contiguous float32 matrix:
+
+    vectors.npy   normalized embeddings, one row per node
+    vectors.json  node IDs, source document IDs and node metadata, in row order
+
+The matrix is opened with mmap, so loading is near-instant and the pages are
+shared by every process that serves the same index. Queries score all rows
+with a single matrix-vector product.
+
+For large document sets, the store can also search an approximate IVF
+(inverted file) index: the vectors are clustered with k-means, and a query
+only scores the vectors in the `n_probe` clusters closest to it. The search
+mode is chosen per query engine:
+
+    index.as_query_engine(similarity_top_k=3, vector_store_kwargs={"search": "ivf", "n_probe": 16})
+
+See llamaindex_ann_benchmark.py for the recall/latency trade-off.
+
+Queries can be restricted with the same metadata filters as SimpleVectorStore,
+for example to one file of an index that holds several:
+
+    MetadataFilters(filters=[MetadataFilter(key="file_name", value="PerksPlus.pdf")])
+"""
+
+import json
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import build_metadata_filter_fn
+from pydantic import PrivateAttr
+
+VECTORS_FILE = "vectors.npy"
+IDS_FILE = "vectors.json"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_LISTS_FILE = "ivf_lists.npy"
+# File written by SimpleVectorStore, converted when an older index is loaded
+SIMPLE_VECTOR_STORE_FILE = "default__vector_store.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Returns the positions of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    # argpartition finds the top k in linear time, then only those k are sorted
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top[np.isfinite(scores[top])]
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, n_iter: int = 10, seed: int = 0) -> np.ndarray:
+    """Clusters normalized vectors with spherical k-means on a sample, returning normalized centroids."""
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), min(len(vectors), n_lists * 32), replace=False))])
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        clusters, starts = np.unique(assignments[order], return_index=True)
+        # Empty clusters keep their previous centroid
+        centroids[clusters] = _normalize(np.add.reduceat(sample[order], starts))
+    return centroids
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    stores_text: bool = False
+
+    _vectors: np.ndarray = PrivateAttr()
+    _ids: list[str] = PrivateAttr()
+    _ref_doc_ids: list[str] = PrivateAttr()
+    _metadata: list[dict] = PrivateAttr()
+    # IVF index: cluster centroids, row indices grouped by cluster, and each cluster's start offset
+    _ivf_centroids: np.ndarray | None = PrivateAttr(default=None)
+    _ivf_lists: np.ndarray | None = PrivateAttr(default=None)
+    _ivf_offsets: np.ndarray | None = PrivateAttr(default=None)
+    _version: int = PrivateAttr(default=0)
+
+    def __init__(
+        self,
+        vectors: np.ndarray | None = None,
+        ids: list[str] | None = None,
+        ref_doc_ids: list[str] | None = None,
+        metadata: list[dict] | None = None,
+    ):
+        super().__init__()
+        self._vectors = vectors if vectors is not None else np.empty((0, 0), dtype=np.float32)
+        self._ids = ids or []
+        self._ref_doc_ids = ref_doc_ids or []
+        self._metadata = metadata or [{} for _ in self._ids]
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    @property
+    def version(self) -> int:
+        """Incremented whenever vectors are added or deleted, so caches can detect index changes."""
+        return self._version
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """The normalized embeddings, one row per node (read-only when memory-mapped)."""
+        return self._vectors
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str | Path) -> "NumpyVectorStore":
+        """Opens a persisted store, memory-mapping its vectors, or converts a SimpleVectorStore file."""
+        persist_dir = Path(persist_dir)
+        if (persist_dir / VECTORS_FILE).exists():
+            ids = json.loads((persist_dir / IDS_FILE).read_text())
+            vectors = np.load(persist_dir / VECTORS_FILE, mmap_mode="r")
+            store = cls(vectors, ids["ids"], ids["ref_doc_ids"], ids.get("metadata"))
+            if (persist_dir / IVF_CENTROIDS_FILE).exists():
+                store._set_ivf(np.load(persist_dir / IVF_CENTROIDS_FILE), np.load(persist_dir / IVF_LISTS_FILE))
+            return store
+        data = json.loads((persist_dir / SIMPLE_VECTOR_STORE_FILE).read_text())
+        ids = list(data["embedding_dict"])
+        vectors = np.array([data["embedding_dict"][node_id] for node_id in ids], dtype=np.float32)
+        ref_doc_ids = [data["text_id_to_ref_doc_id"].get(node_id, node_id) for node_id in ids]
+        metadata = [data.get("metadata_dict", {}).get(node_id, {}) for node_id in ids]
+        return cls(_normalize(vectors) if ids else None, ids, ref_doc_ids, metadata)
+
+    def persist(self, persist_path: str, fs=None) -> None:
+        """Writes the store next to persist_path, the path StorageContext.persist() picks for vector stores."""
+        persist_dir = Path(persist_path).parent
+        persist_dir.mkdir(parents=True, exist_ok=True)
+        np.save(persist_dir / VECTORS_FILE, np.ascontiguousarray(self._vectors, dtype=np.float32))
+        (persist_dir / IDS_FILE).write_text(
+            json.dumps({"ids": self._ids, "ref_doc_ids": self._ref_doc_ids, "metadata": self._metadata})
+        )
+        if self._ivf_centroids is not None:
+            np.save(persist_dir / IVF_CENTROIDS_FILE, self._ivf_centroids)
+            np.save(persist_dir / IVF_LISTS_FILE, self._ivf_lists)
+
+    def _set_ivf(self, centroids: np.ndarray, lists: np.ndarray) -> None:
+        self._ivf_centroids = centroids
+        self._ivf_lists = lists
+        self._ivf_offsets = np.searchsorted(lists[0], np.arange(len(centroids) + 1))
+
+    def build_ivf(self, n_lists: int | None = None, batch_size: int = 65536) -> int:
+        """Clusters the vectors into n_lists clusters (default 4 * sqrt(N)) for IVF search.
+
+        Returns the number of clusters.
+        """
+        n_lists = min(n_lists or int(4 * np.sqrt(len(self._ids))), len(self._ids))
+        centroids = _kmeans(self._vectors, n_lists).astype(np.float32)
+        # Assign in batches so that a memory-mapped matrix is never fully copied into memory
+        assignments = np.concatenate(
+            [
+                np.argmax(np.asarray(self._vectors[start : start + batch_size]) @ centroids.T, axis=1)
+                for start in range(0, len(self._ids), batch_size)
+            ]
+        )
+        order = np.argsort(assignments, kind="stable")
+        # Row 0 holds the sorted cluster numbers, row 1 the vector rows in that order
+        self._set_ivf(centroids, np.stack([assignments[order], order]))
+        return n_lists
+
+    def _changed(self) -> None:
+        self._version += 1
+        self._ivf_centroids = self._ivf_lists = self._ivf_offsets = None
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs) -> list[str]:
+        if not nodes:
+            return []
+        new_vectors = _normalize(np.array([node.get_embedding() for node in nodes], dtype=np.float32))
+        # Appending copies the memory-mapped matrix into memory, which is fine for incremental updates
+        self._vectors = np.concatenate([self._vectors, new_vectors]) if self._ids else new_vectors
+        self._ids.extend(node.node_id for node in nodes)
+        self._ref_doc_ids.extend(node.ref_doc_id or node.node_id for node in nodes)
+        self._metadata.extend(dict(node.metadata) for node in nodes)
+        self._changed()
+        return [node.node_id for node in nodes]
+
+    def delete(self, ref_doc_id: str, **delete_kwargs) -> None:
+        keep = [i for i, doc_id in enumerate(self._ref_doc_ids) if doc_id != ref_doc_id]
+        if len(keep) == len(self._ids):
+            return
+        self._vectors = np.asarray(self._vectors)[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._ref_doc_ids = [self._ref_doc_ids[i] for i in keep]
+        self._metadata = [self._metadata[i] for i in keep]
+        self._changed()
+
+    def _ivf_candidates(self, query_vector: np.ndarray, n_probe: int) -> np.ndarray:
+        """Returns the rows of the vectors in the n_probe clusters closest to the query."""
+        if self._ivf_centroids is None:
+            self.build_ivf()
+        probe = _top_k(self._ivf_centroids @ query_vector, n_probe)
+        return np.concatenate(
+            [self._ivf_lists[1, self._ivf_offsets[cluster] : self._ivf_offsets[cluster + 1]] for cluster in probe]
+        )
+
+    def query(
+        self, query: VectorStoreQuery, search: str = "exact", n_probe: int = 16, **kwargs
+    ) -> VectorStoreQueryResult:
+        """Returns the nodes most similar to the query, searching all vectors or only the closest IVF clusters."""
+        if not self._ids:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+
+        query_vector = np.asarray(query.query_embedding, dtype=np.float32)
+        query_vector = query_vector / (np.linalg.norm(query_vector) or 1)
+        if search == "ivf":
+            # Sorted rows keep reads from a memory-mapped matrix sequential
+            rows = np.sort(self._ivf_candidates(query_vector, n_probe))
+            scores = np.asarray(self._vectors[rows]) @ query_vector
+        elif search == "exact":
+            rows = None
+            scores = self._vectors @ query_vector
+        else:
+            raise ValueError(f"Unknown search mode: {search}")
+
+        if query.node_ids is not None or query.filters is not None:
+            allowed = set(query.node_ids) if query.node_ids is not None else None
+            # The filter function is given rows rather than node IDs, so metadata is looked up by position
+            matches_filters = build_metadata_filter_fn(self._metadata.__getitem__, query.filters)
+            searched_rows = range(len(self._ids)) if rows is None else rows.tolist()
+            keep = [(allowed is None or self._ids[row] in allowed) and matches_filters(row) for row in searched_rows]
+            scores = np.where(keep, scores, -np.inf)
+
+        top = _top_k(scores, query.similarity_top_k)
+        top_rows = top if rows is None else rows[top]
+        return VectorStoreQueryResult(
+            similarities=scores[top].tolist(),
+            ids=[self._ids[row] for row in top_rows],
+        )
@@ -0,0 +1,99 @@
+"""Micro-benchmark of per-call tool dispatch overhead in mcp_server_basic.py.
+
+Runs everything in-process, without HTTP, to isolate what the server itself
+spends on each tool call: date validation, argument validation against the
+tool's input schema, and full dispatch through FastMCP with and without the
+result cache. The strptime row is the previous date validation, kept for
+comparison.
+
+Usage:
+    python examples/mcp_dispatch_benchmark.py --number 20000
+"""
+
+import argparse
+import asyncio
+import re
+import time
+from datetime import datetime
+
+import mcp_server_basic
+from mcp.server.fastmcp.tools import Tool
+from mcp_server_basic import DateRange, app, suggest_hotels, validate_iso_date
+from rich import print
+from rich.table import Table
+
+ARGUMENTS = {
+    "location": "San Francisco",
+    "check_in": "2026-01-01",
+    "check_out": "2026-01-03",
+    "amenities": ["Free WiFi", "Pool"],
+    "limit": 5,
+}
+
+
+def previous_validate_iso_date(date_str: str):
+    iso_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+    if not iso_pattern.match(date_str):
+        raise ValueError(f"must be in ISO format (YYYY-MM-DD), got: {date_str}")
+    return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+
+def time_sync(fn, number: int) -> float:
+    """Returns the mean microseconds per call of fn."""
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def time_async(fn, number: int) -> float:
+    """Returns the mean microseconds per call of the coroutine function fn."""
+    start = time.perf_counter()
+    for _ in range(number):
+        await fn()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=10_000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    # The same argument model that app.tool() builds for the tool
+    tool = Tool.from_function(suggest_hotels)
+    # Warm up: build the location's inventory and fill the result cache
+    await app.call_tool("suggest_hotels", ARGUMENTS)
+
+    async def uncached_call():
+        app.tool_caches["suggest_hotels"].clear()
+        await app.call_tool("suggest_hotels", ARGUMENTS)
+
+    rows = [
+        ("date: regex + strptime (previous)", time_sync(lambda: previous_validate_iso_date("2026-01-01"), args.number)),
+        ("date: validate_iso_date", time_sync(lambda: validate_iso_date("2026-01-01", "check_in"), args.number)),
+        ("date range: DateRange.parse", time_sync(lambda: DateRange.parse("2026-01-01", "2026-01-03"), args.number)),
+        (
+            "arguments: input schema validation",
+            time_sync(lambda: tool.fn_metadata.arg_model.model_validate(ARGUMENTS), args.number),
+        ),
+        (
+            "dispatch: call_tool, cache hit",
+            await time_async(lambda: app.call_tool("suggest_hotels", ARGUMENTS), args.number),
+        ),
+        ("dispatch: call_tool, cache miss", await time_async(uncached_call, args.number // 10)),
+        (
+            "dispatch: call_tool, cache_stats",
+            await time_async(lambda: app.call_tool("cache_stats", {}), args.number),
+        ),
+    ]
+
+    table = Table(title=f"Per-call overhead of {mcp_server_basic.__name__} tools")
+    table.add_column("measurement")
+    table.add_column("µs per call", justify="right")
+    for name, microseconds in rows:
+        table.add_row(name, f"{microseconds:.2f}")
+    print(table)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
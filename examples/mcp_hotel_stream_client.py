@@ -0,0 +1,63 @@
+"""
+Pages through and streams hotels from the local MCP server without an LLM.
+
+Prerequisites:
+  Start the local MCP server defined in `mcp_server_basic.py` on port 8000:
+    python examples/mcp_server_basic.py
+
+The first page is requested in stream mode, so each batch of hotels is printed
+as soon as the server sends it as a progress notification. The following pages
+are fetched with the cursor of the previous page, stopping as soon as enough
+hotels were found instead of fetching every matching hotel.
+"""
+
+import asyncio
+import json
+import logging
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from rich import print
+from rich.logging import RichHandler
+
+logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]", handlers=[RichHandler()])
+logger = logging.getLogger("mcp_hotel_stream_client")
+logger.setLevel(logging.INFO)
+
+MCP_SERVER_URL = "http://localhost:8000/mcp/"
+
+
+async def main():
+    search = {
+        "location": "San Francisco",
+        "check_in": "2026-01-01",
+        "check_out": "2026-01-03",
+        "amenities": ["Free WiFi", "Pool"],
+        "sort_by": "price",
+        "limit": 100,
+    }
+    wanted = 250
+
+    async with streamablehttp_client(MCP_SERVER_URL) as (read, write, _), ClientSession(read, write) as session:
+        await session.initialize()
+
+        async def print_batch(progress: float, total: float | None, message: str | None) -> None:
+            for hotel in json.loads(message or "[]"):
+                print(f"{hotel['name']:<18} ${hotel['price_per_night']:>5.0f}  {hotel['rating']}  {hotel['location']}")
+            logger.info(f"Received {progress:.0f} of {total:.0f} hotels of the first page")
+
+        result = await session.call_tool("suggest_hotels", search | {"stream": True}, progress_callback=print_batch)
+        page = result.structuredContent
+        received = page["streamed"] or len(page["hotels"])
+        logger.info(f"{page['total_matches']} hotels match the search")
+
+        # Fetch more pages only until enough hotels were found
+        while page["next_cursor"] and received < wanted:
+            result = await session.call_tool("suggest_hotels", search | {"cursor": page["next_cursor"]})
+            page = result.structuredContent
+            received += len(page["hotels"])
+            logger.info(f"Received {received} hotels, cheapest on this page: ${page['hotels'][0]['price_per_night']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
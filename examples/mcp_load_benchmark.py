@@ -0,0 +1,173 @@
+"""Load-generation benchmark for the hotel MCP server.
+
+Opens concurrent MCP sessions over streamable-http against the server from
+mcp_server_basic.py and keeps each one calling suggest_hotels with a mix of
+realistic arguments: different locations and filters, follow-up pages via
+cursors, and streamed results. The number of sessions is ramped up in stages,
+and each stage reports throughput, p50/p95/p99 latency and error rate.
+
+Prerequisites:
+  Start the local MCP server, for example with 4 worker processes:
+    python examples/mcp_server_basic.py --workers 4
+
+Usage:
+    python examples/mcp_load_benchmark.py --stages 1,8,32,64 --duration 20 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from rich.console import Console
+from rich.table import Table
+
+LOCATIONS = ["San Francisco", "New York", "Paris", "Tokyo", "Berlin", "Sydney", "Toronto", "Mexico City"]
+AMENITIES = ["Free WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Room Service", "Parking"]
+HOTEL_TYPES = ["Luxury", "Boutique", "Budget", "Business"]
+PRICE_BANDS = ["budget", "moderate", "upscale", "luxury"]
+SORT_BY = ["rating", "price", "available_rooms"]
+
+console = Console(stderr=True)
+
+
+@dataclass
+class StageResult:
+    sessions: int
+    duration_seconds: float
+    calls: int
+    errors: int
+    throughput_per_second: float
+    error_rate: float
+    latency_ms: dict[str, float] = field(default_factory=dict)
+
+
+def random_arguments(rng: random.Random) -> dict:
+    """Returns suggest_hotels arguments resembling what agents send: a few filters and a small page."""
+    day = rng.randint(1, 20)
+    arguments = {
+        "location": rng.choice(LOCATIONS),
+        "check_in": f"2026-03-{day:02d}",
+        "check_out": f"2026-03-{day + rng.randint(1, 7):02d}",
+        "limit": rng.choice([3, 5, 5, 10, 20]),
+    }
+    if rng.random() < 0.7:
+        arguments["amenities"] = rng.sample(AMENITIES, rng.randint(1, 3))
+    if rng.random() < 0.3:
+        arguments["hotel_type"] = rng.choice(HOTEL_TYPES)
+    if rng.random() < 0.4:
+        arguments["price_band"] = rng.choice(PRICE_BANDS)
+    if rng.random() < 0.3:
+        arguments["min_rating"] = rng.choice([3.5, 4.0, 4.5])
+    if rng.random() < 0.3:
+        arguments["sort_by"] = rng.choice(SORT_BY)
+    return arguments
+
+
+async def run_session(url: str, deadline: float, rng: random.Random, latencies: list[float], errors: list[str]):
+    """Calls suggest_hotels in a loop on one MCP session until the deadline, recording each call's latency."""
+    try:
+        async with streamablehttp_client(url) as (read, write, _), ClientSession(read, write) as session:
+            await session.initialize()
+            while time.perf_counter() < deadline:
+                arguments = random_arguments(rng)
+                if rng.random() < 0.1:
+                    arguments["stream"] = True
+                    arguments["limit"] = 100
+                # Some agents ask for one or two more pages of the same search
+                for _ in range(1 + (rng.random() < 0.2) + (rng.random() < 0.1)):
+                    start = time.perf_counter()
+                    try:
+                        result = await session.call_tool(
+                            "suggest_hotels", arguments, progress_callback=_ignore_progress
+                        )
+                    except Exception as e:
+                        errors.append(repr(e))
+                        break
+                    latencies.append(time.perf_counter() - start)
+                    if result.isError:
+                        errors.append(result.content[0].text if result.content else "tool error")
+                        break
+                    if not (cursor := result.structuredContent.get("next_cursor")):
+                        break
+                    arguments["cursor"] = cursor
+    except Exception as e:
+        # The session itself failed, e.g. the server refused the connection
+        errors.append(repr(e))
+
+
+async def _ignore_progress(progress: float, total: float | None, message: str | None) -> None:
+    pass
+
+
+async def run_stage(url: str, sessions: int, duration: float, seed: int) -> StageResult:
+    latencies: list[float] = []
+    errors: list[str] = []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(
+        *(run_session(url, deadline, random.Random(seed + i), latencies, errors) for i in range(sessions))
+    )
+    elapsed = time.perf_counter() - start
+    calls = len(latencies) + len(errors)
+    latencies_ms = np.array(latencies) * 1000
+    return StageResult(
+        sessions=sessions,
+        duration_seconds=round(elapsed, 2),
+        calls=calls,
+        errors=len(errors),
+        throughput_per_second=round(len(latencies) / elapsed, 1),
+        error_rate=round(len(errors) / calls, 4) if calls else 0.0,
+        latency_ms={
+            name: round(float(np.percentile(latencies_ms, percentile)), 2) if len(latencies_ms) else 0.0
+            for name, percentile in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/mcp/", help="MCP server URL")
+    parser.add_argument("--stages", default="1,8,32", help="Comma-separated concurrent session counts to ramp through")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for sessions in [int(stage) for stage in args.stages.split(",")]:
+        console.log(f"Running {sessions} concurrent sessions for {args.duration:.0f}s")
+        results.append(await run_stage(args.url, sessions, args.duration, args.seed))
+
+    table = Table(title=f"suggest_hotels load test against {args.url}")
+    for column in ("sessions", "calls", "calls/s", "p50 ms", "p95 ms", "p99 ms", "errors"):
+        table.add_column(column, justify="right")
+    for result in results:
+        table.add_row(
+            str(result.sessions),
+            str(result.calls),
+            f"{result.throughput_per_second:.1f}",
+            f"{result.latency_ms['p50']:.1f}",
+            f"{result.latency_ms['p95']:.1f}",
+            f"{result.latency_ms['p99']:.1f}",
+            f"{result.error_rate:.2%}",
+        )
+    console.print(table)
+
+    report = json.dumps(
+        {"url": args.url, "seed": args.seed, "stages": [asdict(result) for result in results]}, indent=2
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
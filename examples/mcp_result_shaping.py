@@ -0,0 +1,159 @@
+"""Shaping of large MCP tool results before they reach the model.
+
+Tools like the GitHub list_issues and search tools return large JSON payloads
+of which an agent needs only a few fields. Every result stays in the
+conversation, so its tokens are paid again on every later model call.
+ShapingSession wraps an MCP session and rewrites the JSON text of each result
+according to the tool's ShapingRule:
+
+1. projection: each item of the result's lists keeps only the listed fields,
+   given as dotted paths like "user.login" (lists are mapped over, so
+   "labels.name" yields the names of all labels); fields an item lacks are
+   skipped, so one rule can list the names used by different server versions,
+2. truncation: lists are cut to `max_items` and strings to `max_text_chars`,
+3. summarization: if the text is still longer than `max_chars` and the rule
+   allows it, it is replaced by a summary from an optional, cheap summarizer.
+
+Text that is not JSON skips projection and truncation; only `max_chars`
+applies to it. Tools without a rule and errors pass through unchanged, and the
+structured content of a result is left untouched.
+
+Usage:
+    rules = {"list_issues": ShapingRule(fields=("number", "title", "body"), max_text_chars=400)}
+    session = ShapingSession(session, rules)
+"""
+
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from mcp.types import CallToolResult, ListToolsResult, ReadResourceResult, TextContent
+
+logger = logging.getLogger("mcp_result_shaping")
+
+# Takes the tool name and the result text, returns a shorter text
+Summarizer = Callable[[str, str], Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class ShapingRule:
+    fields: tuple[str, ...] | None = None
+    max_items: int | None = None
+    max_text_chars: int | None = 500
+    max_chars: int | None = None
+    summarize: bool = False
+
+
+def project(value, path: list[str]):
+    """Returns the value at a dotted path, mapping over lists on the way, or None if it is missing."""
+    if isinstance(value, list):
+        values = [project(item, path) for item in value]
+        return [item for item in values if item is not None] or None
+    if not path:
+        return value
+    if isinstance(value, dict):
+        return project(value.get(path[0]), path[1:])
+    return None
+
+
+def truncate(value, rule: ShapingRule):
+    """Cuts long strings and lists anywhere in a JSON value, saying how much was left out."""
+    if isinstance(value, str) and rule.max_text_chars is not None and len(value) > rule.max_text_chars:
+        return f"{value[: rule.max_text_chars]}… [{len(value) - rule.max_text_chars} more characters]"
+    if isinstance(value, list):
+        items = [truncate(item, rule) for item in value[: rule.max_items]]
+        if rule.max_items is not None and len(value) > rule.max_items:
+            items.append(f"[{len(value) - rule.max_items} more items]")
+        return items
+    if isinstance(value, dict):
+        return {key: truncate(item, rule) for key, item in value.items()}
+    return value
+
+
+def shape_json(value, rule: ShapingRule):
+    """Projects the items of the value's lists, at the top level or one level down, onto the rule's fields."""
+    if rule.fields is None:
+        return value
+
+    def project_item(item):
+        if not isinstance(item, dict):
+            return item
+        projected = {field: found for field in rule.fields if (found := project(item, field.split("."))) is not None}
+        # Keep items the fields do not describe at all, rather than losing them
+        return projected or item
+
+    def project_items(items: list):
+        return [project_item(item) for item in items]
+
+    if isinstance(value, list):
+        return project_items(value)
+    if isinstance(value, dict):
+        return {key: project_items(item) if isinstance(item, list) else item for key, item in value.items()}
+    return value
+
+
+class ShapingSession:
+    def __init__(self, session, rules: dict[str, ShapingRule], summarizer: Summarizer | None = None):
+        self.session = session
+        self.rules = rules
+        self.summarizer = summarizer
+        self.chars_in = self.chars_out = 0
+
+    async def shape_text(self, name: str, text: str) -> str:
+        rule = self.rules[name]
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            shaped = text
+        else:
+            shaped = json.dumps(truncate(shape_json(value, rule), rule), ensure_ascii=False, separators=(",", ":"))
+        if rule.summarize and self.summarizer is not None and rule.max_chars and len(shaped) > rule.max_chars:
+            shaped = await self.summarizer(name, shaped)
+        elif rule.max_chars and len(shaped) > rule.max_chars:
+            shaped = truncate(shaped, ShapingRule(max_text_chars=rule.max_chars))
+        return shaped
+
+    async def call_tool(self, name: str, arguments: dict | None = None, **kwargs) -> CallToolResult:
+        result = await self.session.call_tool(name, arguments, **kwargs)
+        if name not in self.rules or result.isError:
+            return result
+        content = []
+        for part in result.content:
+            if isinstance(part, TextContent):
+                shaped = await self.shape_text(name, part.text)
+                self.chars_in += len(part.text)
+                self.chars_out += len(shaped)
+                logger.info(f"Shaped '{name}' result from {len(part.text)} to {len(shaped)} characters")
+                part = part.model_copy(update={"text": shaped})
+            content.append(part)
+        return result.model_copy(update={"content": content})
+
+    def stats(self) -> dict:
+        """Returns the characters of tool results before and after shaping, for this process."""
+        return {"chars_in": self.chars_in, "chars_out": self.chars_out}
+
+    async def list_tools(self, cursor: str | None = None, **kwargs) -> ListToolsResult:
+        return await self.session.list_tools(cursor=cursor, **kwargs)
+
+    async def read_resource(self, uri) -> ReadResourceResult:
+        return await self.session.read_resource(uri)
+
+
+def chat_summarizer(model, max_words: int = 150) -> Summarizer:
+    """Returns a summarizer that asks a LangChain chat model to compress a tool result."""
+
+    async def summarize(name: str, text: str) -> str:
+        response = await model.ainvoke(
+            [
+                (
+                    "system",
+                    f"Compress the output of the '{name}' tool to at most {max_words} words for an agent that "
+                    "triages GitHub issues. Keep every number, URL, title, date and label; drop everything else.",
+                ),
+                ("user", text),
+            ]
+        )
+        return f"[Summary of the {name} result] {response.content}"
+
+    return summarize
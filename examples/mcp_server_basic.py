@@ -1,15 +1,75 @@
-import random
+import argparse
+import base64
+import hashlib
+import inspect
+import json
+import os
 import re
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Annotated
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import date
+from pathlib import Path
+from typing import Annotated, Any, Literal, get_args, get_type_hints
 
+import numpy as np
+import uvicorn
 from faker import Faker
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.types import CallToolResult, ContentBlock
 from pydantic import Field
 
-app = FastMCP()
 fake = Faker()
+# Seeded so that every server process generates the same inventories
+fake.seed_instance(0)
+
+Amenity = Literal["Free WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Room Service", "Parking"]
+HotelType = Literal["Luxury", "Boutique", "Budget", "Business"]
+PriceBand = Literal["budget", "moderate", "upscale", "luxury"]
+SortBy = Literal["rating", "price", "available_rooms"]
+
+# Static tables for generating mock hotels, built once at import
+HOTEL_TYPES = list(get_args(HotelType))
+NAME_SUFFIXES = ["Hotel", "Inn", "Suites", "Resort", "Plaza"]
+AMENITIES = list(get_args(Amenity))
+NEIGHBORHOODS = [
+    "Downtown",
+    "Historic District",
+    "Waterfront",
+    "Business District",
+    "Arts District",
+    "University Area",
+]
+PRICE_RANGES = {
+    "Luxury": (250, 600),
+    "Boutique": (180, 350),
+    "Budget": (80, 150),
+    "Resort": (200, 500),
+    "Business": (150, 300),
+}
+# Nightly price bands, as [min, max) in dollars
+PRICE_BANDS = {"budget": (0, 150), "moderate": (150, 250), "upscale": (250, 400), "luxury": (400, np.inf)}
+MAX_HOTELS = 10_000
+# Number of hotels in each location's inventory, and number of location inventories kept in memory
+INVENTORY_SIZE = 10_000
+MAX_INVENTORIES = 64
+ADDRESS_POOL_SIZE = 1_000
+# Number of hotels sent per progress notification in stream mode
+STREAM_BATCH_SIZE = 20
+# Compiled once: ASCII digits only, and fullmatch so that no trailing characters are accepted
+ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}", re.ASCII)
+
+# Every type and suffix combination, indexed by type * len(NAME_SUFFIXES) + suffix
+HOTEL_NAMES = [f"{hotel_type} {suffix}" for hotel_type in HOTEL_TYPES for suffix in NAME_SUFFIXES]
+MIN_PRICES = np.array([PRICE_RANGES.get(hotel_type, (100, 300))[0] for hotel_type in HOTEL_TYPES])
+MAX_PRICES = np.array([PRICE_RANGES.get(hotel_type, (100, 300))[1] for hotel_type in HOTEL_TYPES])
+# The amenity list for each bitmask of AMENITIES, so a hotel's amenities are a single table lookup
+AMENITY_SETS = [
+    [amenity for bit, amenity in enumerate(AMENITIES) if mask >> bit & 1] for mask in range(1 << len(AMENITIES))
+]
+AMENITY_BITS = 1 << np.arange(len(AMENITIES))
+ADDRESS_POOL = [fake.street_address() for _ in range(ADDRESS_POOL_SIZE)]
 
 
 @dataclass
@@ -27,6 +87,11 @@ class Hotel:
 @dataclass
 class HotelSuggestions:
     hotels: list[Hotel]
+    total_matches: int
+    # Pass as `cursor` to get the next page, None on the last page
+    next_cursor: str | None = None
+    # Number of hotels of this page that were sent as progress notifications instead of in `hotels`
+    streamed: int = 0
 
 
 def validate_iso_date(date_str: str, param_name: str):
@@ -43,87 +108,440 @@ def validate_iso_date(date_str: str, param_name: str):
     Raises:
         ValueError: If the date is not in ISO format or is invalid
     """
-    iso_pattern = re.compile(r"^\d{4}-\d{2}-\d{2}$")
-    if not iso_pattern.match(date_str):
+    if not ISO_DATE_PATTERN.fullmatch(date_str):
         raise ValueError(f"{param_name} must be in ISO format (YYYY-MM-DD), got: {date_str}")
 
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d").date()
+        return date.fromisoformat(date_str)
     except ValueError as e:
         raise ValueError(f"Invalid {param_name}: {e}")
 
 
+@dataclass(frozen=True)
+class DateRange:
+    """A validated stay: check_in and check_out dates, with check_out after check_in."""
+
+    check_in: date
+    check_out: date
+
+    @classmethod
+    def parse(cls, check_in: str, check_out: str) -> "DateRange":
+        """
+        Validates check-in and check-out date arguments together.
+
+        Raises:
+            ValueError: If a date is not in ISO format or is invalid, or check_out is not after check_in
+        """
+        check_in_date = validate_iso_date(check_in, "check_in")
+        check_out_date = validate_iso_date(check_out, "check_out")
+        if check_out_date <= check_in_date:
+            raise ValueError("check_out date must be after check_in date")
+        return cls(check_in_date, check_out_date)
+
+
+class HotelInventory:
+    """
+    The mock hotels of one location, stored as NumPy columns with inverted indexes.
+
+    The inventory is generated in one NumPy batch from a seed derived from the
+    location, so a location always has the same hotels, in every server process.
+    Each inverted index maps an amenity, hotel type or price band to the sorted
+    rows of the hotels that have it, so filters are array intersections and
+    Hotel objects are only built for the hotels that are returned.
+    """
+
+    def __init__(self, location: str, size: int = INVENTORY_SIZE):
+        self.location = location
+        normalized = " ".join(location.lower().split())
+        rng = np.random.default_rng(int.from_bytes(hashlib.sha256(normalized.encode()).digest()[:8], "little"))
+        self.types = rng.integers(len(HOTEL_TYPES), size=size)
+        self.names = self.types * len(NAME_SUFFIXES) + rng.integers(len(NAME_SUFFIXES), size=size)
+        self.neighborhoods = rng.integers(len(NEIGHBORHOODS), size=size)
+        self.addresses = rng.integers(ADDRESS_POOL_SIZE, size=size)
+        self.ratings = np.round(rng.uniform(3.0, 5.0, size=size), 1)
+        self.prices = np.rint(rng.uniform(MIN_PRICES[self.types], MAX_PRICES[self.types])).astype(np.int64)
+        self.rooms = rng.integers(1, 16, size=size)
+
+        # Pick 3 to 6 distinct amenities per hotel: the amenities with the lowest random keys win
+        amenity_counts = rng.integers(3, 7, size=size)
+        amenity_ranks = np.argsort(np.argsort(rng.random((size, len(AMENITIES))), axis=1), axis=1)
+        self.amenity_masks = ((amenity_ranks < amenity_counts[:, None]) * AMENITY_BITS).sum(axis=1)
+
+        self.amenity_index = {
+            amenity: np.flatnonzero(self.amenity_masks & bit) for amenity, bit in zip(AMENITIES, AMENITY_BITS.tolist())
+        }
+        self.type_index = {hotel_type: np.flatnonzero(self.types == i) for i, hotel_type in enumerate(HOTEL_TYPES)}
+        self.price_band_index = {
+            band: np.flatnonzero((self.prices >= low) & (self.prices < high))
+            for band, (low, high) in PRICE_BANDS.items()
+        }
+        self.locations = [f"{neighborhood}, {location}" for neighborhood in NEIGHBORHOODS]
+
+    def __len__(self) -> int:
+        return len(self.ratings)
+
+    def search(
+        self,
+        amenities: list[str] | None = None,
+        hotel_type: str | None = None,
+        price_band: str | None = None,
+        min_rating: float | None = None,
+        sort_by: str = "rating",
+    ) -> np.ndarray:
+        """
+        Returns the rows of the hotels that match all the given filters, in sort order.
+
+        Args:
+            amenities: Amenities that every returned hotel must have
+            hotel_type: The type of hotel to return
+            price_band: The nightly price band to return
+            min_rating: The lowest rating to return
+            sort_by: "rating" (best first), "price" (cheapest first) or "available_rooms" (most first)
+
+        Returns:
+            The matching rows
+        """
+        postings = [self.amenity_index[amenity] for amenity in amenities or []]
+        if hotel_type is not None:
+            postings.append(self.type_index[hotel_type])
+        if price_band is not None:
+            postings.append(self.price_band_index[price_band])
+
+        if postings:
+            # Intersecting the shortest lists first keeps the intermediate results small
+            postings.sort(key=len)
+            rows = postings[0]
+            for posting in postings[1:]:
+                rows = np.intersect1d(rows, posting, assume_unique=True)
+        else:
+            rows = np.arange(len(self))
+        if min_rating is not None:
+            rows = rows[self.ratings[rows] >= min_rating]
+
+        if sort_by == "rating":
+            sort_key = -self.ratings[rows]
+        elif sort_by == "price":
+            sort_key = self.prices[rows]
+        else:
+            sort_key = -self.rooms[rows]
+        return rows[np.argsort(sort_key, kind="stable")]
+
+    def hotels(self, rows: np.ndarray) -> list[Hotel]:
+        """Builds the Hotel objects of the given rows."""
+        return [
+            Hotel(
+                name=HOTEL_NAMES[name],
+                address=ADDRESS_POOL[address],
+                location=self.locations[neighborhood],
+                rating=rating,
+                price_per_night=price,
+                hotel_type=HOTEL_TYPES[hotel_type],
+                # Copied so that callers can modify a hotel's amenities without changing the shared table
+                amenities=list(AMENITY_SETS[mask]),
+                available_rooms=available_rooms,
+            )
+            for name, address, neighborhood, rating, price, hotel_type, mask, available_rooms in zip(
+                self.names[rows].tolist(),
+                self.addresses[rows].tolist(),
+                self.neighborhoods[rows].tolist(),
+                self.ratings[rows].tolist(),
+                self.prices[rows].tolist(),
+                self.types[rows].tolist(),
+                self.amenity_masks[rows].tolist(),
+                self.rooms[rows].tolist(),
+            )
+        ]
+
+
+inventories: OrderedDict[str, HotelInventory] = OrderedDict()
+
+
+def get_inventory(location: str) -> HotelInventory:
+    """Returns the inventory of a location, generating it on first use and keeping the most recent ones."""
+    key = " ".join(location.lower().split())
+    if key in inventories:
+        inventories.move_to_end(key)
+    else:
+        inventories[key] = HotelInventory(location)
+        if len(inventories) > MAX_INVENTORIES:
+            inventories.popitem(last=False)
+    return inventories[key]
+
+
+def encode_cursor(search_key: str, offset: int) -> str:
+    """Returns an opaque cursor for the page of a search that starts at offset."""
+    return base64.urlsafe_b64encode(f"{search_key}:{offset}".encode()).decode()
+
+
+def decode_cursor(cursor: str, search_key: str) -> int:
+    """
+    Returns the offset encoded in a cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed or was returned by a different search
+    """
+    try:
+        cursor_key, offset = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        offset = int(offset)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if cursor_key != search_key:
+        raise ValueError("The cursor was returned by a different search, start again without a cursor")
+    return offset
+
+
+class ToolResultCache:
+    """
+    LRU cache of serialized tool results with a time-to-live.
+
+    Results are stored as the CallToolResult sent to clients, so a cache hit
+    skips both running the tool and serializing its result.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self._entries: OrderedDict[str, tuple[float, CallToolResult]] = OrderedDict()
+
+    def get(self, key: str) -> CallToolResult | None:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, result: CallToolResult) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drops every cached result, keeping the counters."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CachingFastMCP(FastMCP):
+    """
+    FastMCP server that serves repeated calls of deterministic tools from a result cache.
+
+    Results are cached where tool calls are dispatched, so a cached tool stays a
+    plain function that returns its declared type. Cached results are stored as
+    the CallToolResult sent to clients, so a cache hit skips running the tool and
+    serializing its result.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Result cache of each cached tool, by tool name
+        self.tool_caches: dict[str, ToolResultCache] = {}
+        self._cache_keys: dict[str, tuple[inspect.Signature, Callable[[dict[str, Any]], bool] | None]] = {}
+
+    def cached_tool(
+        self, maxsize: int = 1024, ttl: float = 300, bypass: Callable[[dict[str, Any]], bool] | None = None
+    ):
+        """
+        Caches the results of a deterministic tool, keyed by its arguments with defaults filled in.
+
+        Apply it below @app.tool(); the function itself is returned unchanged. Context
+        arguments are left out of the key. Exceptions and error results are not cached.
+
+        Args:
+            maxsize: The number of results kept before evicting the least recently used
+            ttl: Seconds a result stays valid
+            bypass: Returns True for arguments whose calls must always run, e.g. calls that stream
+        """
+
+        def decorator(fn):
+            hints = get_type_hints(fn)
+            signature = inspect.signature(fn)
+            parameters = [
+                parameter
+                for parameter in signature.parameters.values()
+                if Context not in (hints.get(parameter.name), *get_args(hints.get(parameter.name)))
+            ]
+            self._cache_keys[fn.__name__] = (signature.replace(parameters=parameters), bypass)
+            self.tool_caches[fn.__name__] = ToolResultCache(maxsize, ttl)
+            return fn
+
+        return decorator
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any]
+    ) -> Sequence[ContentBlock] | dict[str, Any] | CallToolResult:
+        if name not in self.tool_caches:
+            return await super().call_tool(name, arguments)
+        signature, bypass = self._cache_keys[name]
+        try:
+            bound = signature.bind(**arguments)
+        except TypeError:
+            # Let FastMCP report the invalid arguments
+            return await super().call_tool(name, arguments)
+        bound.apply_defaults()
+        if bypass is not None and bypass(bound.arguments):
+            return await super().call_tool(name, arguments)
+
+        cache = self.tool_caches[name]
+        key = json.dumps(bound.arguments, sort_keys=True, default=str)
+        if (result := cache.get(key)) is not None:
+            return result
+        result = await super().call_tool(name, arguments)
+        if isinstance(result, tuple):
+            unstructured, structured = result
+            result = CallToolResult(content=list(unstructured), structuredContent=structured)
+        elif not isinstance(result, CallToolResult):
+            result = CallToolResult(content=list(result))
+        if not result.isError:
+            cache.put(key, result)
+        return result
+
+
+app = CachingFastMCP()
+
+
 @app.tool()
+@app.cached_tool(maxsize=4096, ttl=300, bypass=lambda arguments: arguments["stream"])
 async def suggest_hotels(
     location: Annotated[str, Field(description="Location (city or area) to search for hotels")],
     check_in: Annotated[str, Field(description="Check-in date in ISO format (YYYY-MM-DD)")],
     check_out: Annotated[str, Field(description="Check-out date in ISO format (YYYY-MM-DD)")],
+    amenities: Annotated[
+        list[Amenity] | None, Field(description="Only return hotels that have all of these amenities")
+    ] = None,
+    hotel_type: Annotated[HotelType | None, Field(description="Only return hotels of this type")] = None,
+    price_band: Annotated[
+        PriceBand | None,
+        Field(
+            description="Only return hotels in this nightly price band: budget <$150, moderate $150-250, "
+            "upscale $250-400, luxury $400+"
+        ),
+    ] = None,
+    min_rating: Annotated[float | None, Field(description="Only return hotels rated at least this", ge=0, le=5)] = None,
+    sort_by: Annotated[
+        SortBy, Field(description="Sort by rating (best first), price (cheapest first) or available_rooms")
+    ] = "rating",
+    limit: Annotated[
+        int, Field(description=f"Number of hotels to return, up to {MAX_HOTELS}", ge=1, le=MAX_HOTELS)
+    ] = 5,
+    cursor: Annotated[
+        str | None, Field(description="The next_cursor of the previous page, to get the following hotels")
+    ] = None,
+    stream: Annotated[
+        bool, Field(description="Send the hotels in batches as progress notifications while the page is built")
+    ] = False,
+    ctx: Context | None = None,
 ) -> HotelSuggestions:
     """
     Suggest hotels based on location and dates.
+    Pass the user's requirements as filters instead of filtering the results yourself.
+    Results are paginated: if next_cursor is set, call again with it to get more hotels.
     """
-    # Validate dates
-    check_in_date = validate_iso_date(check_in, "check_in")
-    check_out_date = validate_iso_date(check_out, "check_out")
-
-    # Ensure check_out is after check_in
-    if check_out_date <= check_in_date:
-        raise ValueError("check_out date must be after check_in date")
-
-    # Create realistic mock data for hotels
-    hotel_types = ["Luxury", "Boutique", "Budget", "Business"]
-    amenities = ["Free WiFi", "Pool", "Spa", "Gym", "Restaurant", "Bar", "Room Service", "Parking"]
-
-    # Generate a rating between 3.0 and 5.0
-    def generate_rating():
-        return round(random.uniform(3.0, 5.0), 1)
-
-    # Generate a price based on hotel type
-    def generate_price(hotel_type):
-        price_ranges = {
-            "Luxury": (250, 600),
-            "Boutique": (180, 350),
-            "Budget": (80, 150),
-            "Resort": (200, 500),
-            "Business": (150, 300),
-        }
-        min_price, max_price = price_ranges.get(hotel_type, (100, 300))
-        return round(random.uniform(min_price, max_price))
-
-    # Generate between 3 and 8 hotels
-    num_hotels = random.randint(3, 8)
-    hotels = []
-
-    neighborhoods = [
-        "Downtown",
-        "Historic District",
-        "Waterfront",
-        "Business District",
-        "Arts District",
-        "University Area",
-    ]
-
-    for i in range(num_hotels):
-        hotel_type = random.choice(hotel_types)
-        hotel_amenities = random.sample(amenities, random.randint(3, 6))
-        neighborhood = random.choice(neighborhoods)
-
-        hotel = Hotel(
-            name=f"{hotel_type} {['Hotel', 'Inn', 'Suites', 'Resort', 'Plaza'][random.randint(0, 4)]}",
-            address=fake.street_address(),
-            location=f"{neighborhood}, {location}",
-            rating=generate_rating(),
-            price_per_night=generate_price(hotel_type),
-            hotel_type=hotel_type,
-            amenities=hotel_amenities,
-            available_rooms=random.randint(1, 15),
-        )
-        hotels.append(hotel)
-
-    # Sort by rating to show best hotels first
-    hotels.sort(key=lambda x: x.rating, reverse=True)
-    return HotelSuggestions(hotels=hotels)
+    DateRange.parse(check_in, check_out)
+
+    # Cursors are only valid for the search that returned them, since offsets mean nothing in another result list
+    search = [" ".join(location.lower().split()), sorted(amenities or []), hotel_type, price_band, min_rating, sort_by]
+    search_key = hashlib.sha256(json.dumps(search).encode()).hexdigest()[:16]
+    offset = decode_cursor(cursor, search_key) if cursor else 0
+
+    inventory = get_inventory(location)
+    rows = inventory.search(amenities, hotel_type, price_band, min_rating, sort_by)
+    page = rows[offset : offset + limit]
+    next_cursor = encode_cursor(search_key, offset + limit) if offset + limit < len(rows) else None
+
+    # Streaming needs a progress token: clients that did not send one get the whole page in the result
+    if stream and ctx is not None and ctx.request_context.meta and ctx.request_context.meta.progressToken is not None:
+        for start in range(0, len(page), STREAM_BATCH_SIZE):
+            batch = inventory.hotels(page[start : start + STREAM_BATCH_SIZE])
+            # Awaiting each notification lets a client that cancels the call stop the remaining work
+            await ctx.report_progress(start + len(batch), len(page), json.dumps([asdict(hotel) for hotel in batch]))
+        return HotelSuggestions(hotels=[], total_matches=len(rows), next_cursor=next_cursor, streamed=len(page))
+    return HotelSuggestions(hotels=inventory.hotels(page), total_matches=len(rows), next_cursor=next_cursor)
+
+
+@app.tool()
+async def cache_stats() -> dict[str, dict[str, Any]]:
+    """
+    Returns the result cache metrics of each cached tool: size, hits, misses, hit rate, evictions and expirations.
+    """
+    return {name: cache.stats() for name, cache in app.tool_caches.items()}
+
+
+@app.resource("cache://stats", mime_type="application/json")
+def cache_stats_resource() -> str:
+    """Result cache metrics of each cached tool, as JSON."""
+    return json.dumps({name: cache.stats() for name, cache in app.tool_caches.items()})
+
+
+def create_http_app(stateless: bool = True):
+    """
+    Returns the streamable-http ASGI app, stateless by default for uvicorn worker processes.
+
+    The stateless app answers every request from what the request carries, so any
+    worker can serve any request of any client. This is what makes running
+    several workers behind one socket safe, since nothing ties a client to the
+    worker that served its previous request: inventories are regenerated
+    identically from their seed, and cursors hold their own offset.
+    """
+    app.settings.stateless_http = stateless
+    return app.streamable_http_app()
+
+
+def serve(host: str, port: int, workers: int, backlog: int, graceful_timeout: int) -> None:
+    """Serves the app from one process with stateful sessions, or from several that share one listening socket."""
+    if workers == 1:
+        target, target_kwargs = create_http_app(stateless=False), {}
+    else:
+        # Each worker process imports this module and builds its own stateless app
+        target = "mcp_server_basic:create_http_app"
+        target_kwargs = {"factory": True, "app_dir": str(Path(__file__).parent)}
+    uvicorn.run(
+        target,
+        host=host,
+        port=port,
+        workers=workers,
+        # Connections waiting to be accepted, raise it when many agents connect at once
+        backlog=backlog,
+        # On SIGINT/SIGTERM, stop accepting connections and give in-flight tool calls this long to finish
+        timeout_graceful_shutdown=graceful_timeout,
+        **target_kwargs,
+    )
 
 
 if __name__ == "__main__":
-    app.run(transport="streamable-http")
+    parser = argparse.ArgumentParser(description="Hotel search MCP server over streamable-http")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("MCP_WORKERS", "1")),
+        help="Worker processes, 0 for one per CPU core (default 1: single process with stateful sessions)",
+    )
+    parser.add_argument("--host", default=os.getenv("MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("MCP_PORT", "8000")))
+    parser.add_argument("--backlog", type=int, default=2048, help="Maximum number of pending connections")
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=30, help="Seconds to let in-flight requests finish on shutdown"
+    )
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers or os.cpu_count(), args.backlog, args.graceful_timeout)
@@ -0,0 +1,185 @@
+"""Long-lived MCP client sessions shared by all agents in a process.
+
+Opening an MCP session over streamable-http costs an initialize round-trip,
+and most agent frameworks follow it with a tools/list round-trip. Examples
+that open a new session for every user request pay both each time.
+get_session() instead returns one PooledSession per server URL that:
+
+- connects on first use and then stays open across agent runs,
+- caches the tools/list result for the lifetime of the connection,
+- reconnects and retries once when the connection breaks, for example
+  when the server restarts and no longer knows the session ID.
+
+A PooledSession has the list_tools(), call_tool(), read_resource() and
+send_request() methods of an MCP ClientSession, so it can be handed to
+LangChain's MCP adapters:
+
+    tools = await load_mcp_tools(get_session("http://localhost:8000/mcp/"))
+    ...
+    await close_sessions()
+"""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from contextlib import AsyncExitStack
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.session import MessageHandlerFnT
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, Implementation, ListToolsResult, ReadResourceResult
+
+logger = logging.getLogger("mcp_session_pool")
+
+# Transport errors after which the session is assumed dead and is reopened
+CONNECTION_ERRORS = (
+    httpx.TransportError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+# The error the streamable-http client reports when the server no longer knows the session ID
+SESSION_TERMINATED = (32600, "Session terminated")
+
+
+def is_connection_error(error: Exception) -> bool:
+    """Returns whether the session is dead. Other McpErrors are ordinary JSON-RPC errors or timeouts."""
+    if isinstance(error, McpError):
+        return (error.error.code, error.error.message) == SESSION_TERMINATED
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class PooledSession:
+    def __init__(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        message_handler: MessageHandlerFnT | None = None,
+        on_connect: Callable[["PooledSession"], None] | None = None,
+    ):
+        self.url = url
+        self.headers = headers
+        self.message_handler = message_handler
+        self.on_connect = on_connect
+        # Name and version the server reported when the current connection was initialized
+        self.server_info: Implementation | None = None
+        self._session: ClientSession | None = None
+        self._owner: asyncio.Task | None = None
+        self._closing: asyncio.Event | None = None
+        self._lock = asyncio.Lock()
+        self._tools: dict[str | None, ListToolsResult] = {}
+
+    async def _own_session(self, ready: asyncio.Future) -> None:
+        """Opens the session and keeps it open until asked to close.
+
+        The transport's task group must be exited by the task that entered it,
+        so one long-running task owns the session while other tasks use it.
+        """
+        try:
+            async with AsyncExitStack() as stack:
+                read, write, _ = await stack.enter_async_context(streamablehttp_client(self.url, headers=self.headers))
+                session = await stack.enter_async_context(
+                    ClientSession(read, write, message_handler=self.message_handler)
+                )
+                self.server_info = (await session.initialize()).serverInfo
+                ready.set_result(session)
+                await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP session to {self.url} ended: {e!r}")
+        finally:
+            self._session = None
+
+    async def session(self) -> ClientSession:
+        """Returns the open ClientSession, connecting first if needed."""
+        connected = False
+        async with self._lock:
+            if self._session is None:
+                self._closing = asyncio.Event()
+                ready = asyncio.get_running_loop().create_future()
+                self._owner = asyncio.create_task(self._own_session(ready))
+                self._session = await ready
+                self._tools.clear()
+                connected = True
+                logger.info(f"Opened MCP session to {self.url}")
+        session = self._session
+        if connected and self.on_connect is not None:
+            self.on_connect(self)
+        return session
+
+    async def _disconnect(self) -> None:
+        if self._owner is not None:
+            self._closing.set()
+            await asyncio.gather(self._owner, return_exceptions=True)
+            self._owner = None
+        self._session = None
+
+    async def _with_reconnect(self, call):
+        session = await self.session()
+        try:
+            return await call(session)
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            logger.warning(f"MCP session to {self.url} failed ({e!r}), reconnecting")
+            async with self._lock:
+                # Another task may already have reconnected
+                if self._session is session:
+                    await self._disconnect()
+            return await call(await self.session())
+
+    async def initialize(self) -> None:
+        """Connects if needed. Present so that code written for a ClientSession can call it."""
+        await self.session()
+
+    async def list_tools(self, cursor: str | None = None, **kwargs) -> ListToolsResult:
+        """Returns a page of the server's tools, from the server only once per connection."""
+        if cursor not in self._tools:
+            self._tools[cursor] = await self._with_reconnect(lambda session: session.list_tools(cursor=cursor))
+        return self._tools[cursor]
+
+    def invalidate_tools(self) -> None:
+        """Makes the next list_tools() call fetch the tools from the server again."""
+        self._tools.clear()
+
+    async def call_tool(self, name: str, arguments: dict | None = None, **kwargs) -> CallToolResult:
+        return await self._with_reconnect(lambda session: session.call_tool(name, arguments, **kwargs))
+
+    async def read_resource(self, uri) -> ReadResourceResult:
+        return await self._with_reconnect(lambda session: session.read_resource(uri))
+
+    async def send_request(self, request, result_type, **kwargs):
+        return await self._with_reconnect(lambda session: session.send_request(request, result_type, **kwargs))
+
+    async def aclose(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+
+_sessions: dict[str, PooledSession] = {}
+
+
+def get_session(
+    url: str,
+    headers: dict[str, str] | None = None,
+    message_handler: MessageHandlerFnT | None = None,
+    on_connect: Callable[[PooledSession], None] | None = None,
+) -> PooledSession:
+    """Returns the process-wide session for an MCP server URL, creating it on first use.
+
+    The headers and hooks only apply when the session is created.
+    """
+    if url not in _sessions:
+        _sessions[url] = PooledSession(url, headers, message_handler, on_connect)
+    return _sessions[url]
+
+
+async def close_sessions() -> None:
+    """Closes every pooled session, call it once before the process exits."""
+    await asyncio.gather(*(session.aclose() for session in _sessions.values()))
+    _sessions.clear()
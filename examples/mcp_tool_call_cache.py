@@ -0,0 +1,170 @@
+"""Tool-call cache and in-run deduplication for MCP tools.
+
+CachingSession wraps an MCP session (such as a PooledSession) and serves
+repeated calls of read-only tools without calling the server:
+
+- across runs, successful results are stored in a SQLite file keyed by the
+  server URL, a hash of the session's request headers, the tool name and the
+  canonical JSON of the arguments, and are reused until the tool's TTL has
+  passed. The headers carry the credentials, like the GitHub token, so results
+  fetched for one user are never served to another,
+- within a run, a call identical to an earlier one returns the earlier result
+  immediately, even while the earlier call is still in flight, with a note
+  telling the model that the repeated call did not use up its tool budget.
+
+Only tools listed in `ttls` are cached or deduplicated; every other tool is
+always called. Use a TTL of 0 to deduplicate a tool within a run only.
+
+Usage:
+    tool_calls = CachingSession(session, ttls={"search_code": 1800, "search_issues": 600})
+    tools = [convert_mcp_tool_to_langchain_tool(tool_calls, tool) for tool in mcp_tools]
+    tool_calls.new_run()
+    ...
+    print(tool_calls.run_stats())
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from agent_budget import RunBudget
+from mcp.types import CallToolRequest, CallToolResult, ClientRequest, ListToolsResult, ReadResourceResult, TextContent
+from mcp_tool_catalog import CACHE_DIR
+
+logger = logging.getLogger("mcp_tool_call_cache")
+
+DUPLICATE_NOTE = (
+    "This exact call was already made in this run, so its earlier result is repeated below. "
+    "It did not count as a new tool call."
+)
+
+
+def canonical_arguments(arguments: dict | None) -> str:
+    """Returns the arguments as JSON with sorted keys and without null values, which models send inconsistently."""
+    arguments = {name: value for name, value in (arguments or {}).items() if value is not None}
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+class CachingSession:
+    def __init__(
+        self,
+        session,
+        ttls: dict[str, float],
+        cache_path: str | Path = CACHE_DIR / "tool_calls.sqlite3",
+        max_entries: int = 10_000,
+    ):
+        self.session = session
+        self.ttls = ttls
+        self.max_entries = max_entries
+        # Identifies the credentials the session calls tools with, without storing them
+        self._identity = hashlib.sha256(json.dumps(session.headers or {}, sort_keys=True).encode()).hexdigest()
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tool_calls (key TEXT PRIMARY KEY, result TEXT, expires_at REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tool_calls_last_used ON tool_calls (last_used)")
+        self.new_run()
+
+    def new_run(self, budget: RunBudget | None = None) -> None:
+        """Starts a new agent run: forgets the calls made so far and resets the run counters.
+
+        Calls that reach the server are charged to the run's budget, if given, and refused once it is exhausted.
+        """
+        self.budget = budget
+        self._run_calls: dict[str, asyncio.Future] = {}
+        self._stats = {"server_calls": 0, "cache_hits": 0, "duplicates": 0}
+
+    def run_stats(self) -> dict[str, int]:
+        """Returns how the tool calls of the current run were served; only server_calls used the server."""
+        return dict(self._stats)
+
+    def _key(self, name: str, arguments: dict | None) -> str:
+        key = f"{self.session.url}\0{self._identity}\0{name}\0{canonical_arguments(arguments)}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _lookup(self, key: str) -> CallToolResult | None:
+        row = self._conn.execute(
+            "SELECT result FROM tool_calls WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        self._conn.execute("UPDATE tool_calls SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        return CallToolResult.model_validate_json(row[0])
+
+    def _store(self, key: str, result: CallToolResult, ttl: float) -> None:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO tool_calls VALUES (?, ?, ?, ?)",
+            (key, result.model_dump_json(by_alias=True, exclude_none=True), now + ttl, now),
+        )
+        self._conn.execute("DELETE FROM tool_calls WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM tool_calls").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM tool_calls WHERE key IN (SELECT key FROM tool_calls ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    async def _call_server(self, name: str, arguments: dict | None, **kwargs) -> CallToolResult | None:
+        """Calls the tool on the server, or returns None if the run's budget does not allow another call."""
+        if self.budget is not None and not self.budget.charge_tool_call():
+            logger.info(f"Refused call to '{name}', the run budget is exhausted")
+            return None
+        self._stats["server_calls"] += 1
+        return await self.session.call_tool(name, arguments, **kwargs)
+
+    async def _call(self, key: str, name: str, arguments: dict | None, **kwargs) -> CallToolResult:
+        if self.ttls[name] > 0 and (result := self._lookup(key)) is not None:
+            self._stats["cache_hits"] += 1
+            logger.info(f"Served '{name}' from the tool-call cache")
+            return result
+        result = await self._call_server(name, arguments, **kwargs)
+        if result is None:
+            return self.budget.refused_result()
+        if self.ttls[name] > 0 and not result.isError:
+            self._store(key, result, self.ttls[name])
+        return result
+
+    async def call_tool(self, name: str, arguments: dict | None = None, **kwargs) -> CallToolResult:
+        if name not in self.ttls:
+            result = await self._call_server(name, arguments, **kwargs)
+            return self.budget.refused_result() if result is None else result
+
+        key = self._key(name, arguments)
+        if (earlier := self._run_calls.get(key)) is not None:
+            self._stats["duplicates"] += 1
+            logger.info(f"Repeated call to '{name}' answered with the result from earlier in this run")
+            result = await asyncio.shield(earlier)
+            return result.model_copy(
+                update={"content": [TextContent(type="text", text=DUPLICATE_NOTE), *result.content]}
+            )
+
+        call = self._run_calls[key] = asyncio.ensure_future(self._call(key, name, arguments, **kwargs))
+        try:
+            result = await call
+        except BaseException:
+            # Let a later identical call try again
+            self._run_calls.pop(key, None)
+            raise
+        if result.isError:
+            self._run_calls.pop(key, None)
+        return result
+
+    async def send_request(self, request: ClientRequest, result_type, **kwargs):
+        """Routes tools/call requests, as sent by PydanticAI, through the cache."""
+        if isinstance(request.root, CallToolRequest):
+            return await self.call_tool(request.root.params.name, request.root.params.arguments)
+        return await self.session.send_request(request, result_type, **kwargs)
+
+    async def list_tools(self, cursor: str | None = None, **kwargs) -> ListToolsResult:
+        return await self.session.list_tools(cursor=cursor, **kwargs)
+
+    async def read_resource(self, uri) -> ReadResourceResult:
+        return await self.session.read_resource(uri)
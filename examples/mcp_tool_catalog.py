@@ -0,0 +1,122 @@
+"""On-disk cache of MCP tool catalogs, so agents start without tool discovery.
+
+Agents that use a handful of tools from a large MCP server, like the GitHub
+one, otherwise list every tool on the server and filter them on every start.
+A ToolCatalog keeps the filtered tool definitions in a JSON file keyed by the
+server URL and the wanted tool names, together with the server name and
+version that served them:
+
+- at startup, the tools are read from the file without contacting the server,
+- when the agent's session connects and the server reports another version,
+  or when the server sends a tools/list_changed notification, the catalog is
+  fetched again in the background and the file is rewritten for the next start.
+
+The tools are stored as MCP tool definitions rather than framework objects:
+LangChain and PydanticAI tools hold live callbacks into an MCP session and
+cannot be written to disk, but converting a definition into one is local and
+cheap.
+
+    catalog = ToolCatalog(url, headers, tool_names=("list_issues", "search_issues"))
+    mcp_tools = await catalog.get_tools()
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+from mcp.types import ServerNotification, Tool, ToolListChangedNotification
+from mcp_session_pool import PooledSession, get_session
+
+logger = logging.getLogger("mcp_tool_catalog")
+
+CACHE_DIR = Path(__file__).parent / ".mcp_tool_cache"
+
+
+class ToolCatalog:
+    def __init__(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        tool_names: tuple[str, ...] | None = None,
+        cache_dir: Path = CACHE_DIR,
+    ):
+        self.url = url
+        self.tool_names = tuple(sorted(tool_names)) if tool_names else None
+        key = hashlib.sha256(json.dumps([url, self.tool_names]).encode()).hexdigest()[:16]
+        self.path = cache_dir / f"{key}.json"
+        # The session the agent calls tools through also delivers the server's version and notifications
+        self.session = get_session(url, headers, message_handler=self._handle_message, on_connect=self._check_version)
+        self._refresh: asyncio.Task | None = None
+
+    def load(self) -> dict | None:
+        """Returns the cached catalog, or None if there is none for this server and tool selection."""
+        try:
+            catalog = json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if catalog.get("url") != self.url:
+            return None
+        return catalog
+
+    async def fetch(self) -> list[Tool]:
+        """Lists the tools on the server, keeps the wanted ones and rewrites the cache file."""
+        self.session.invalidate_tools()
+        tools: list[Tool] = []
+        cursor = None
+        while True:
+            page = await self.session.list_tools(cursor=cursor)
+            tools.extend(page.tools)
+            if not (cursor := page.nextCursor):
+                break
+        if self.tool_names:
+            tools = [tool for tool in tools if tool.name in self.tool_names]
+
+        server_info = self.session.server_info
+        catalog = {
+            "url": self.url,
+            "server": {"name": server_info.name, "version": server_info.version} if server_info else None,
+            "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so a concurrent reader never sees a partial catalog
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(catalog, indent=2), encoding="utf-8")
+        tmp_path.replace(self.path)
+        logger.info(f"Cached {len(tools)} tools from {self.url} in {self.path}")
+        return tools
+
+    async def get_tools(self) -> list[Tool]:
+        """Returns the wanted tools from the cache file, fetching them from the server only if there is none."""
+        if catalog := self.load():
+            return [Tool.model_validate(tool) for tool in catalog["tools"]]
+        return await self.fetch()
+
+    def refresh(self, reason: str) -> None:
+        """Fetches the catalog again in the background, unless a refresh is already running."""
+        if self._refresh is None or self._refresh.done():
+            logger.info(f"Refreshing the tool catalog of {self.url}: {reason}")
+            self._refresh = asyncio.create_task(self.fetch())
+            self._refresh.add_done_callback(self._log_refresh_error)
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Refreshing the tool catalog of {self.url} failed: {task.exception()!r}")
+
+    def _check_version(self, session: PooledSession) -> None:
+        catalog = self.load()
+        if catalog is None or session.server_info is None:
+            return
+        server = {"name": session.server_info.name, "version": session.server_info.version}
+        if catalog["server"] != server:
+            self.refresh(f"server changed from {catalog['server']} to {server}")
+
+    async def _handle_message(self, message) -> None:
+        if isinstance(message, ServerNotification) and isinstance(message.root, ToolListChangedNotification):
+            self.refresh("the server sent tools/list_changed")
+
+    async def aclose(self) -> None:
+        """Waits for a running refresh, so the cache file is complete before the process exits."""
+        if self._refresh is not None:
+            await asyncio.gather(self._refresh, return_exceptions=True)
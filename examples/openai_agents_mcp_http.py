@@ -7,44 +7,27 @@ Start the local MCP server defined in `mcp_server_basic.py` on port 8000:
 
 import asyncio
 import logging
-import os
 
 from agents import Agent, OpenAIChatCompletionsModel, Runner, set_tracing_disabled
 from agents.mcp.server import MCPServerStreamableHttp
 from agents.model_settings import ModelSettings
-from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from providers import aclose, get_async_openai_client, get_model_name
 
 logging.basicConfig(level=logging.WARNING)
 # Disable tracing since we're not connected to a supported tracing provider
 set_tracing_disabled(disabled=True)
 
-# Setup the OpenAI client to use either Azure OpenAI or GitHub Models
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
-
-async_credential = None
-if API_HOST == "azure":
-    async_credential = DefaultAzureCredential()
-    token_provider = get_bearer_token_provider(async_credential, "https://cognitiveservices.azure.com/.default")
-    client = AsyncOpenAI(
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1",
-        api_key=token_provider,
-    )
-    MODEL_NAME = os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"]
-elif API_HOST == "github":
-    client = AsyncOpenAI(api_key=os.environ["GITHUB_TOKEN"], base_url="https://models.inference.ai.azure.com")
-    MODEL_NAME = os.getenv("GITHUB_MODEL", "gpt-4o")
-elif API_HOST == "ollama":
-    client = AsyncOpenAI(base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"), api_key="none")
-    MODEL_NAME = os.environ["OLLAMA_MODEL"]
-else:
-    client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    MODEL_NAME = os.environ.get("OPENAI_MODEL", "gpt-4o")
-
-
-mcp_server = MCPServerStreamableHttp(name="weather", params={"url": "http://localhost:8000/mcp/"})
+# Setup the OpenAI client for the configured API_HOST, sharing one pooled HTTP client
+client = get_async_openai_client()
+MODEL_NAME = get_model_name()
+
+
+# One MCP session per process, connected once and reused by every run.
+# cache_tools_list skips the tools/list round-trip the SDK otherwise makes on every run,
+# and max_retry_attempts retries tool calls that fail on a transient connection error.
+mcp_server = MCPServerStreamableHttp(
+    name="weather", params={"url": "http://localhost:8000/mcp/"}, cache_tools_list=True, max_retry_attempts=2
+)
 
 agent = Agent(
     name="Assistant",
@@ -55,16 +38,24 @@ agent = Agent(
 )
 
 
-async def main():
-    await mcp_server.connect()
-    message = "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. I need free WiFi and a pool."
+async def answer(message: str) -> str:
+    # Connect on first use, and again if a previous failure closed the session
+    if mcp_server.session is None:
+        await mcp_server.connect()
     result = await Runner.run(starting_agent=agent, input=message)
-    print(result.final_output)
+    return result.final_output
+
+
+async def main():
+    for message in [
+        "Find me a hotel in San Francisco for 2 nights starting from 2024-01-01. I need free WiFi and a pool.",
+        "Find me a budget hotel in Paris for 3 nights starting from 2024-02-10.",
+    ]:
+        print(await answer(message))
 
     await mcp_server.cleanup()
 
-    if async_credential:
-        await async_credential.close()
+    await aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,198 @@
+"""Shared model client setup for the examples.
+
+Every example needs an OpenAI-compatible client for the configured API_HOST.
+This module builds that client once per (host, model) on top of a pooled,
+keep-alive HTTP client, so that all agents in a process reuse the same
+TLS connections instead of each opening their own.
+
+Usage:
+    from providers import get_async_openai_client, get_model_name
+
+    client = get_async_openai_client()
+    model = OpenAIChatModel(get_model_name(), provider=OpenAIProvider(openai_client=client))
+
+The GitHub Models endpoint and the default model names follow each framework's
+own examples: the Agent Framework examples use models.github.ai with
+"openai/gpt-4o", the others models.inference.ai.azure.com with "gpt-4o", and the
+LangChain examples default to "gpt-4o-mini" on OpenAI.com. Pass `framework` to
+get the defaults of a framework other than the OpenAI-client based ones.
+
+The connection pool can be tuned with these optional environment variables:
+    OPENAI_HTTP_MAX_CONNECTIONS: total connections per pool (default 20)
+    OPENAI_HTTP_MAX_KEEPALIVE: idle connections kept open per pool (default 10)
+    OPENAI_HTTP_KEEPALIVE_EXPIRY: seconds an idle connection is kept open (default 60)
+    OPENAI_HTTP_PREWARM: connections opened ahead of time by prewarm() (default 2)
+"""
+
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+logger = logging.getLogger("providers")
+
+load_dotenv(override=True)
+API_HOST = os.getenv("API_HOST", "github")
+
+
+@dataclass(frozen=True)
+class ModelConfig:
+    host: str
+    model: str
+    base_url: str | None
+
+
+def get_model_config(host: str = API_HOST, framework: str | None = None) -> ModelConfig:
+    """Returns the endpoint and model name configured for the given API host.
+
+    framework is "agent_framework", "langchain" or None, and selects that framework's defaults.
+    """
+    if host == "azure":
+        return ModelConfig(
+            host,
+            os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"],
+            os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1/",
+        )
+    elif host == "github":
+        if framework == "agent_framework":
+            return ModelConfig(host, os.getenv("GITHUB_MODEL", "openai/gpt-4o"), "https://models.github.ai/inference")
+        return ModelConfig(host, os.getenv("GITHUB_MODEL", "gpt-4o"), "https://models.inference.ai.azure.com")
+    elif host == "ollama":
+        return ModelConfig(
+            host,
+            os.environ.get("OLLAMA_MODEL", "llama3.1"),
+            os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"),
+        )
+    else:
+        default_model = "gpt-4o-mini" if framework == "langchain" else "gpt-4o"
+        return ModelConfig(host, os.environ.get("OPENAI_MODEL", default_model), None)
+
+
+def get_model_name(host: str = API_HOST, framework: str | None = None) -> str:
+    """Returns the model (or Azure deployment) name for the given API host."""
+    return get_model_config(host, framework).model
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_HTTP_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("OPENAI_HTTP_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("OPENAI_HTTP_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+_async_http_clients: dict[tuple[str, str], httpx.AsyncClient] = {}
+_http_clients: dict[tuple[str, str], httpx.Client] = {}
+_async_openai_clients: dict[tuple[str, str, str | None], AsyncOpenAI] = {}
+
+
+def _api_key(host: str, use_async: bool):
+    if host == "azure":
+        # Tokens come from a shared cache that is refreshed in the background, see azure_token_cache.py
+        import azure_token_cache
+
+        return azure_token_cache.get_bearer_token_provider(use_async=use_async)
+    elif host == "github":
+        return os.environ["GITHUB_TOKEN"]
+    elif host == "ollama":
+        return "none"
+    else:
+        return os.environ["OPENAI_API_KEY"]
+
+
+def get_async_http_client(host: str = API_HOST, model: str | None = None) -> httpx.AsyncClient:
+    """Returns the pooled async HTTP client shared by everything talking to (host, model)."""
+    key = (host, model or get_model_name(host))
+    if key not in _async_http_clients:
+        _async_http_clients[key] = httpx.AsyncClient(limits=_pool_limits(), timeout=httpx.Timeout(600.0, connect=5.0))
+    return _async_http_clients[key]
+
+
+def get_http_client(host: str = API_HOST, model: str | None = None) -> httpx.Client:
+    """Returns the pooled sync HTTP client shared by everything talking to (host, model)."""
+    key = (host, model or get_model_name(host))
+    if key not in _http_clients:
+        _http_clients[key] = httpx.Client(limits=_pool_limits(), timeout=httpx.Timeout(600.0, connect=5.0))
+    return _http_clients[key]
+
+
+def get_async_openai_client(
+    host: str = API_HOST, model: str | None = None, framework: str | None = None
+) -> AsyncOpenAI:
+    """Returns the shared AsyncOpenAI client for (host, model) on the framework's endpoint."""
+    config = get_model_config(host, framework)
+    model = model or config.model
+    key = (host, model, config.base_url)
+    if key not in _async_openai_clients:
+        _async_openai_clients[key] = AsyncOpenAI(
+            base_url=config.base_url,
+            api_key=_api_key(host, use_async=True),
+            http_client=get_async_http_client(host, model),
+        )
+    return _async_openai_clients[key]
+
+
+def get_chat_openai(host: str = API_HOST, model: str | None = None, **kwargs):
+    """Returns a LangChain ChatOpenAI model that shares the pooled HTTP clients for (host, model)."""
+    from langchain_openai import ChatOpenAI
+
+    config = get_model_config(host, framework="langchain")
+    model = model or config.model
+    return ChatOpenAI(
+        model=model,
+        base_url=config.base_url,
+        api_key=_api_key(host, use_async=False),
+        http_client=get_http_client(host, model),
+        http_async_client=get_async_http_client(host, model),
+        **kwargs,
+    )
+
+
+def get_agent_framework_client(host: str = API_HOST, model: str | None = None):
+    """Returns an Agent Framework OpenAIChatClient that shares the pooled client for (host, model)."""
+    from agent_framework.openai import OpenAIChatClient
+
+    model = model or get_model_name(host, framework="agent_framework")
+    return OpenAIChatClient(
+        model_id=model, async_client=get_async_openai_client(host, model, framework="agent_framework")
+    )
+
+
+async def prewarm(
+    host: str = API_HOST, model: str | None = None, connections: int | None = None, framework: str | None = None
+) -> None:
+    """Opens connections to the model endpoint ahead of the first request.
+
+    Each concurrent request forces the pool to complete a TCP + TLS handshake,
+    and the connection is then kept alive for the first real model call.
+    Failures are logged and ignored since prewarming is only an optimization.
+    """
+    if connections is None:
+        connections = int(os.getenv("OPENAI_HTTP_PREWARM", "2"))
+    client = get_async_openai_client(host, model, framework)
+    http_client = get_async_http_client(host, model or get_model_name(host, framework))
+    results = await asyncio.gather(
+        *(http_client.head(str(client.base_url)) for _ in range(connections)), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Could not prewarm connection to {client.base_url}: {result}")
+
+
+async def aclose() -> None:
+    """Closes the pooled HTTP clients and Azure credentials. Call once at process shutdown."""
+    for client in _async_http_clients.values():
+        await client.aclose()
+    for client in _http_clients.values():
+        client.close()
+    _async_http_clients.clear()
+    _http_clients.clear()
+    _async_openai_clients.clear()
+    if API_HOST == "azure":
+        import azure_token_cache
+
+        azure_token_cache.close()
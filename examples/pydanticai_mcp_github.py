@@ -1,9 +1,11 @@
 """PydanticAI + GitHub MCP example.
 
 This example creates an MCP server adapter that points at the GitHub MCP
-endpoint, lists available tools, filters them to a small set useful for
-triaging issues, and then sends those tools to a PydanticAI Agent which
-produces a structured IssueProposal.
+endpoint, takes a small set of tools useful for triaging issues from a
+catalog cached on disk (only the first run lists the server's tools),
+and then sends those tools to a PydanticAI Agent which produces a
+structured IssueProposal. Each run has a hard budget of tool calls, tokens
+and seconds; once it is used up, the agent must answer with its proposal.
 
 Prerequisites:
 - Set GITHUB_TOKEN in your environment or in a .env file.
@@ -18,17 +20,21 @@ import json
 import logging
 import os
 
-from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
-from dotenv import load_dotenv
-from openai import AsyncOpenAI
+import mcp.types as mcp_types
+from agent_budget import RunBudget
+from mcp_session_pool import close_sessions
+from mcp_tool_call_cache import CachingSession
+from mcp_tool_catalog import ToolCatalog
+from providers import aclose, get_async_openai_client, get_model_name
 from pydantic import BaseModel, Field
-from pydantic_ai import Agent, CallToolsNode, ModelRequestNode
+from pydantic_ai import Agent, CallToolsNode, ModelRequestNode, RunContext
 from pydantic_ai.mcp import MCPServerStreamableHTTP
 from pydantic_ai.messages import (
     ToolReturnPart,
 )
 from pydantic_ai.models.openai import OpenAIChatModel
 from pydantic_ai.providers.openai import OpenAIProvider
+from pydantic_ai.tools import ToolDefinition
 from rich import print
 from rich.logging import RichHandler
 
@@ -36,27 +42,38 @@ logging.basicConfig(level=logging.WARNING, format="%(message)s", datefmt="[%X]",
 logger = logging.getLogger("pydanticai_mcp_github")
 
 
-load_dotenv(override=True)
-API_HOST = os.getenv("API_HOST", "github")
+# Setup the OpenAI client for the configured API_HOST, sharing one pooled HTTP client
+model = OpenAIChatModel(get_model_name(), provider=OpenAIProvider(openai_client=get_async_openai_client()))
+
+
+class CatalogMCPServer(MCPServerStreamableHTTP):
+    """MCP server whose tools come from a ToolCatalog and whose calls go through the catalog's pooled session.
+
+    The pooled session connects on the first tool call and stays open across runs, and it is the session
+    on which the catalog watches for a new server version or a tools/list_changed notification.
+    Passing a CachingSession as the client serves repeated tool calls from its cache.
+    """
+
+    def __init__(self, catalog: ToolCatalog, client: CachingSession | None = None, **kwargs):
+        super().__init__(catalog.url, headers=catalog.session.headers, **kwargs)
+        self.catalog = catalog
+        self._client = client or catalog.session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return None
+
+    async def list_tools(self) -> list[mcp_types.Tool]:
+        return await self.catalog.get_tools()
 
-async_credential = None
-if API_HOST == "azure":
-    async_credential = DefaultAzureCredential()
-    token_provider = get_bearer_token_provider(async_credential, "https://cognitiveservices.azure.com/.default")
-    client = AsyncOpenAI(
-        base_url=os.environ["AZURE_OPENAI_ENDPOINT"] + "/openai/v1",
-        api_key=token_provider,
-    )
-    model = OpenAIChatModel(os.environ["AZURE_OPENAI_CHAT_DEPLOYMENT"], provider=OpenAIProvider(openai_client=client))
-elif API_HOST == "github":
-    client = AsyncOpenAI(api_key=os.environ["GITHUB_TOKEN"], base_url="https://models.inference.ai.azure.com")
-    model = OpenAIChatModel(os.getenv("GITHUB_MODEL", "gpt-4o"), provider=OpenAIProvider(openai_client=client))
-elif API_HOST == "ollama":
-    client = AsyncOpenAI(base_url=os.environ.get("OLLAMA_ENDPOINT", "http://localhost:11434/v1"), api_key="none")
-    model = OpenAIChatModel(os.environ["OLLAMA_MODEL"], provider=OpenAIProvider(openai_client=client))
-else:
-    client = AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
-    model = OpenAIChatModel(os.environ.get("OPENAI_MODEL", "gpt-4o"), provider=OpenAIProvider(openai_client=client))
+
+# Seconds that tool results are reused across runs: code changes less often than issues and pull requests
+TOOL_CACHE_TTLS = {"search_code": 1800, "search_issues": 600, "search_pull_requests": 600, "list_issues": 300}
+
+# Hard limits for each triage run, the same as in the LangChain version of this example
+RUN_BUDGET = {"max_tool_calls": 6, "max_tokens": 80_000, "max_seconds": 120}
 
 
 class IssueProposal(BaseModel):
@@ -70,11 +87,24 @@ class IssueProposal(BaseModel):
 
 
 async def main():
-    server = MCPServerStreamableHTTP(
-        url="https://api.githubcopilot.com/mcp/", headers={"Authorization": f"Bearer {os.getenv('GITHUB_TOKEN', '')}"}
-    )
     desired_tool_names = ("list_issues", "search_code", "search_issues", "search_pull_requests")
-    filtered_tools = server.filtered(lambda ctx, tool_def: tool_def.name in desired_tool_names)
+    catalog = ToolCatalog(
+        "https://api.githubcopilot.com/mcp/",
+        headers={"Authorization": f"Bearer {os.getenv('GITHUB_TOKEN', '')}"},
+        tool_names=desired_tool_names,
+    )
+    tool_calls = CachingSession(catalog.session, ttls=TOOL_CACHE_TTLS)
+    filtered_tools = CatalogMCPServer(catalog, tool_calls)
+    budget = RunBudget(**RUN_BUDGET)
+    tool_calls.new_run(budget)
+
+    def budget_exhausted(ctx: RunContext[None]) -> str | None:
+        budget.tokens = ctx.usage.total_tokens
+        return budget.exhausted()
+
+    async def enforce_budget(ctx: RunContext[None], tool_defs: list[ToolDefinition]) -> list[ToolDefinition]:
+        # Without the research tools, the only answer left to the model is the IssueProposal output tool
+        return [] if budget_exhausted(ctx) else tool_defs
 
     agent: Agent[None, IssueProposal] = Agent(
         model,
@@ -84,8 +114,13 @@ async def main():
         ),
         output_type=IssueProposal,
         toolsets=[filtered_tools],
+        prepare_tools=enforce_budget,
     )
 
+    @agent.instructions
+    def budget_instructions(ctx: RunContext[None]) -> str:
+        return budget.final_answer_instructions() if budget_exhausted(ctx) else ""
+
     user_content = "Find an issue from Azure-samples azure-search-openai-demo that can be closed."
     async with agent.iter(user_content) as agent_run:
         async for node in agent_run:
@@ -97,9 +132,12 @@ async def main():
                 logger.info(f"Got tool result:\n{tool_return_value[0:200]}...")
 
     print(agent_run.result.output)
+    logger.info(f"Tool calls: {tool_calls.run_stats()}")
+    logger.info(f"Budget usage: {budget.usage()}")
 
-    if async_credential:
-        await async_credential.close()
+    await catalog.aclose()
+    await close_sessions()
+    await aclose()
 
 
 if __name__ == "__main__":